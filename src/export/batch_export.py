@@ -0,0 +1,151 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Author   : zhyemqww
+# @Time     : 2026/10/18 23:12
+# @File     : batch_export
+# @Project  : Toolbox
+# @Desc     : headless batch export of the plots
+from __future__ import annotations
+
+import io
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Iterator
+
+# matplotlib is imported by the first export, after the backend is chosen
+if TYPE_CHECKING:
+    from matplotlib.figure import Figure
+
+
+def render_figure(plotter: str, data: object, **kwargs) -> Figure:
+    """
+    Render a plot without showing it
+    :param plotter: "venn", "upset" or "volcano"
+    :param data: The data of the plot
+    :param kwargs: The keyword arguments of Venn.plot, Upset.plot or Volcano.plot
+    :return: The figure
+    """
+    if plotter == "venn":
+        from src.venn.venn import Venn
+        return Venn().plot(data, show=False, **kwargs)
+    if plotter == "upset":
+        from src.venn.upset import Upset
+        return Upset().plot(data, show=False, **kwargs)
+    if plotter == "volcano":
+        from src.scatter.volcano import Volcano
+        return Volcano.plot(data, show=False, **kwargs)
+
+    raise Exception(f"Unknown plotter: {plotter}")
+
+
+def export_figure(fig: Figure, path: str | None = None, fmt: str | None = None, dpi: float = 100) -> bytes | str:
+    """
+    Save a figure and close it
+    :param fig: The figure
+    :param path: The file path, None to return the encoded figure
+    :param fmt: The file format, e.g. "png", "svg" or "pdf", None to infer it from the path (png without a path)
+    :param dpi: The resolution of the raster formats
+    :return: The file path, or the encoded figure if no path is given
+    """
+    from matplotlib import pyplot as plt
+
+    try:
+        if path is None:
+            buffer = io.BytesIO()
+            fig.savefig(buffer, format=fmt or "png", dpi=dpi)
+            return buffer.getvalue()
+
+        fig.savefig(path, format=fmt, dpi=dpi)
+        return path
+    finally:
+        plt.close(fig)
+
+
+def export_job(job: dict) -> bytes | str:
+    """
+    Render and save one plot
+    :param job: A dictionary with the keys
+                plotter: "venn", "upset" or "volcano"
+                data: the data of the plot
+                kwargs (optional): the keyword arguments of the plotter
+                path (optional): the file path, without a path the encoded figure is returned
+                format (optional): the file format
+                dpi (optional): the resolution of the raster formats
+    :return: The file path, or the encoded figure if no path is given
+    """
+    from matplotlib import pyplot as plt
+
+    figures = set(plt.get_fignums())
+    try:
+        fig = render_figure(job["plotter"], job["data"], **job.get("kwargs", {}))
+        return export_figure(fig, path=job.get("path"), fmt=job.get("format"), dpi=job.get("dpi", 100))
+    finally:
+        # close the figures of a failed job as well
+        for num in set(plt.get_fignums()) - figures:
+            plt.close(num)
+
+
+def batch_export(jobs: list[dict], n_jobs: int = 1) -> list[bytes | str]:
+    """
+    Render and save many plots with the Agg backend. With more than one job the plots are rendered in a process
+    pool, otherwise they are rendered in the current process, whose backend is restored afterwards.
+    :param jobs: The plots, see export_job
+    :param n_jobs: The number of worker processes, -1 for the number of CPUs
+    :return: The file path, or the encoded figure, of every job
+    """
+    if n_jobs == 1:
+        with agg_backend():
+            return [export_job(job) for job in jobs]
+
+    with ProcessPoolExecutor(None if n_jobs == -1 else n_jobs, initializer=init_worker) as executor:
+        return list(executor.map(export_job, jobs))
+
+
+def init_worker() -> None:
+    """
+    Use the non interactive Agg backend in the worker process
+    """
+    import matplotlib
+
+    matplotlib.use("Agg")
+
+
+@contextmanager
+def agg_backend() -> Iterator[None]:
+    """
+    Use the non interactive Agg backend in the current process and restore the previous backend afterwards
+    """
+    import matplotlib
+    from matplotlib import pyplot as plt
+
+    backend = matplotlib.get_backend()
+    if backend.lower() == "agg":
+        yield
+        return
+
+    plt.switch_backend("Agg")
+    try:
+        yield
+    finally:
+        plt.switch_backend(backend)
+
+
+if __name__ == '__main__':
+    import random
+    import time
+
+    import matplotlib
+
+    matplotlib.use("Agg")
+
+    rng = random.Random(0)
+    batch = []
+    for _ in range(24):
+        da = {s: {rng.randint(0, 500) for _ in range(100)} for s in "abcd"}
+        batch.append({"plotter": "upset", "data": da})
+        batch.append({"plotter": "venn", "data": {k: da[k] for k in "abc"}, "format": "svg"})
+
+    for jobs_count in (1, 2, 4):
+        t = time.perf_counter()
+        batch_export(batch, n_jobs=jobs_count)
+        print(f"{jobs_count} jobs: {len(batch) / (time.perf_counter() - t):.1f} figures per second")
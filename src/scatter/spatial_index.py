@@ -0,0 +1,110 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Author   : zhyemqww
+# @Time     : 2026/10/19 01:05
+# @File     : spatial_index
+# @Project  : Toolbox
+# @Desc     : grid bucket index for the nearest point lookup of the scatter plots
+import math
+from typing import Optional
+
+import numpy as np
+
+
+class GridIndex:
+    """
+    Uniform grid bucket index over 2d points. The points are sorted by the cell they fall in, so the points of a cell
+    are one contiguous slice, and a nearest point query only scans the rings of cells around the query point.
+    """
+
+    def __init__(self, x: np.ndarray, y: np.ndarray, bucket_size: int = 8):
+        """
+        Build the index.
+        Args:
+            x (np.ndarray): The x of the points.
+            y (np.ndarray): The y of the points.
+            bucket_size (int): The average number of points per cell.
+        """
+        self.x = np.asarray(x, dtype=float)
+        self.y = np.asarray(y, dtype=float)
+        if self.x.shape != self.y.shape or self.x.ndim != 1:
+            raise Exception("x and y must be flat arrays of the same length")
+
+        # the points with a nan coordinate are never found
+        valid = np.flatnonzero(np.isfinite(self.x) & np.isfinite(self.y))
+        self.nx = self.ny = max(1, math.ceil(math.sqrt(len(valid) / bucket_size)))
+        if len(valid):
+            self.x_min, self.x_max = self.x[valid].min(), self.x[valid].max()
+            self.y_min, self.y_max = self.y[valid].min(), self.y[valid].max()
+        else:
+            self.x_min = self.x_max = self.y_min = self.y_max = 0.0
+        self.cell_width = (self.x_max - self.x_min) / self.nx or 1.0
+        self.cell_height = (self.y_max - self.y_min) / self.ny or 1.0
+
+        cells = self.cal_cell_x(self.x[valid]) + self.nx * self.cal_cell_y(self.y[valid])
+        order = np.argsort(cells, kind="stable")
+        self.order = valid[order]
+        self.starts = np.searchsorted(cells[order], np.arange(self.nx * self.ny + 1))
+
+    def __len__(self) -> int:
+        return len(self.order)
+
+    def cal_cell_x(self, x: np.ndarray | float) -> np.ndarray | int:
+        return np.clip(((x - self.x_min) // self.cell_width).astype(int), 0, self.nx - 1)
+
+    def cal_cell_y(self, y: np.ndarray | float) -> np.ndarray | int:
+        return np.clip(((y - self.y_min) // self.cell_height).astype(int), 0, self.ny - 1)
+
+    def query(self, x: float, y: float, max_distance: float = math.inf,
+              scale: tuple[float, float] = (1.0, 1.0)) -> Optional[int]:
+        """
+        Find the nearest point.
+        Args:
+            x (float): The x of the query point.
+            y (float): The y of the query point.
+            max_distance (float): The maximum distance of the nearest point.
+            scale (tuple): The factors of the x and y differences in the distance, e.g. the pixels per data unit of
+                the axes, so the distance is measured on the screen.
+
+        Returns:
+            int: The position of the nearest point in x and y, None if no point is within the maximum distance.
+        """
+        if not len(self):
+            return None
+
+        sx, sy = scale
+        cx, cy = int(self.cal_cell_x(np.float64(x))), int(self.cal_cell_y(np.float64(y)))
+        # the points of ring r + 1 are at least r cells away from the query point
+        step = min(self.cell_width * sx, self.cell_height * sy)
+        best, best_distance = None, math.inf
+        for ring in range(max(self.nx, self.ny)):
+            reach = max(0.0, ring - 1) * step
+            if reach > max_distance or reach >= best_distance:
+                break
+
+            candidates = self.cal_ring(cx, cy, ring)
+            if not len(candidates):
+                continue
+            distances = np.hypot((self.x[candidates] - x) * sx, (self.y[candidates] - y) * sy)
+            nearest = int(np.argmin(distances))
+            if distances[nearest] < best_distance:
+                best, best_distance = int(candidates[nearest]), float(distances[nearest])
+
+        return best if best_distance <= max_distance else None
+
+    def cal_ring(self, cx: int, cy: int, ring: int) -> np.ndarray:
+        """
+        The points of the cells at the chebyshev distance ring from the cell (cx, cy).
+        """
+        if ring == 0:
+            cells = [(cx, cy)]
+        else:
+            cells = [(i, cy - ring) for i in range(cx - ring, cx + ring + 1)]
+            cells += [(i, cy + ring) for i in range(cx - ring, cx + ring + 1)]
+            cells += [(cx - ring, j) for j in range(cy - ring + 1, cy + ring)]
+            cells += [(cx + ring, j) for j in range(cy - ring + 1, cy + ring)]
+
+        starts = self.starts
+        slices = [self.order[starts[i + self.nx * j]:starts[i + self.nx * j + 1]]
+                  for i, j in cells if 0 <= i < self.nx and 0 <= j < self.ny]
+        return np.concatenate(slices) if slices else np.empty(0, dtype=int)
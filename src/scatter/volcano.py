@@ -5,20 +5,70 @@
 # @File     : volcano
 # @Project  : Toolbox
 # @Desc     :
-from typing import Iterable, Optional
+from __future__ import annotations
 
-from matplotlib import pyplot as plt
-from pandas import DataFrame
+from typing import TYPE_CHECKING, Callable, Iterable, Optional
+
+import numpy as np
+
+from src.scatter.spatial_index import GridIndex
+
+if TYPE_CHECKING:
+    from matplotlib.figure import Figure
+    from pandas import DataFrame, Series
 
 class Volcano:
+    # labels of the classification
+    DOWN = -1
+    NORMAL = 0
+    UP = 1
+
     def __init__(self):
         pass
 
+    @staticmethod
+    def classify(data: DataFrame, y_threshold: Optional[float] = None, x_max_threshold: Optional[float] = None,
+                 x_min_threshold: Optional[float] = None) -> np.ndarray:
+        """
+        Classify the points of a volcano plot in one vectorized pass.
+        Without any x threshold, the points above the y threshold are up.
+        Args:
+            data (DataFrame): The data, with the columns "x" and "y".
+            y_threshold (float): The y threshold.
+            x_max_threshold (float): The x max threshold.
+            x_min_threshold (float): The x min threshold.
+
+        Returns:
+            np.ndarray: The int8 label of every row, Volcano.UP, Volcano.DOWN or Volcano.NORMAL.
+        """
+        x = data["x"].to_numpy()
+        y = data["y"].to_numpy()
+        significant = y > y_threshold if y_threshold is not None else np.ones(len(data), dtype=bool)
+
+        conditions = []
+        choices = []
+        if x_max_threshold is not None:
+            conditions.append(significant & (x > x_max_threshold))
+            choices.append(Volcano.UP)
+        if x_min_threshold is not None:
+            conditions.append(significant & (x < x_min_threshold))
+            choices.append(Volcano.DOWN)
+        if x_max_threshold is None and x_min_threshold is None and y_threshold is not None:
+            conditions.append(significant)
+            choices.append(Volcano.UP)
+
+        if not conditions:
+            return np.full(len(data), Volcano.NORMAL, dtype=np.int8)
+        return np.select(conditions, choices, Volcano.NORMAL).astype(np.int8)
+
     @staticmethod
     def plot(data: DataFrame, title: str, x_label: str, y_label: str, fig_size: tuple = (10, 6),
              axes_spine_visibility: Iterable = ("right", 'top'), axes_spine_line_width: float = 1.0,
              y_threshold: Optional[float] = None, x_max_threshold: Optional[float] = None,
-             x_min_threshold: Optional[float] = None) -> None:
+             x_min_threshold: Optional[float] = None, show: bool = True,
+             large_threshold: Optional[int] = 100_000, density: Optional[str] = None,
+             density_grid_size: int = 200, on_pick: Optional[Callable[[Series], None]] = None,
+             on_hover: Optional[Callable[[Optional[Series]], None]] = None, pick_radius: float = 5) -> Figure:
         """
         Plot a volcano plot.
                 x min threshold     x max threshold
@@ -36,39 +86,32 @@ class Volcano:
             title (str): The title.
             x_label (str): The label of x-axis.
             y_label (str): The label of y-axis.
+            show (bool): Whether to show the figure.
+            large_threshold (int): Above this number of points the large data mode is used, the normal points are
+                rasterized and not pickable, only the up and down points stay pickable. None to disable the mode.
+                With on_pick or on_hover no artist is pickable, the points are found by a spatial index.
+            density (str): In the large data mode, draw the normal points as a density layer, "hist2d" or "hexbin",
+                instead of a rasterized scatter.
+            density_grid_size (int): The number of bins of the density layer per axis.
+            on_pick (Callable): Called with the row of the data nearest to a mouse click.
+            on_hover (Callable): Called with the row of the data nearest to the mouse when it changes, None when no
+                point is within the pick radius.
+            pick_radius (float): The maximum distance in pixels of a picked or hovered point.
+
+        Returns:
+            Figure: The figure.
         """
-        up = DataFrame()
-        down = DataFrame()
-        normal = DataFrame()
+        if density not in (None, "hist2d", "hexbin"):
+            raise Exception(f"Unknown density: {density}")
+        large = large_threshold is not None and len(data) > large_threshold
 
-        if y_threshold is not None:
-            if x_max_threshold is not None and x_min_threshold is not None:
-                up = data[(data["x"] > x_max_threshold) & (data["y"] > y_threshold)]
-                down = data[(data["x"] < x_min_threshold) & (data["y"] > y_threshold)]
-            elif x_max_threshold is not None:
-                up = data[(data["x"] > x_max_threshold) & (data["y"] > y_threshold)]
-            elif x_min_threshold is not None:
-                down = data[(data["x"] < x_min_threshold) & (data["y"] > y_threshold)]
-            else:
-                up = data[data["y"] > y_threshold]
-        else:
-            if x_max_threshold is not None and x_min_threshold is not None:
-                up = data[data["x"] > x_max_threshold]
-                down = data[data["x"] < x_min_threshold]
-            elif x_max_threshold is not None:
-                up = data[data["x"] > x_max_threshold]
-            elif x_min_threshold is not None:
-                down = data[data["x"] < x_min_threshold]
-
-        normal = data[~data.index.isin(up.index.union(down.index))]
-
-        print(up.columns)
-        print(down.columns)
-        print(normal.columns)
-
-        print(up)
-        print(down)
-        print(normal)
+        labels = Volcano.classify(data, y_threshold, x_max_threshold, x_min_threshold)
+        x = data["x"].to_numpy()
+        y = data["y"].to_numpy()
+
+        # matplotlib is only imported by the first plot
+        from matplotlib import pyplot as plt
+        from matplotlib.colors import LinearSegmentedColormap, LogNorm
 
         fig, ax = plt.subplots(figsize=fig_size)
 
@@ -81,12 +124,27 @@ class Volcano:
         ax.set_xlabel(x_label, fontdict={'size': 12})
         ax.set_ylabel(y_label, fontdict={'size': 12})
 
-        if not normal.empty:
-            ax.scatter(normal["x"], normal["y"], s=10, color="#fbb929", picker=True, pickradius=5)
-        if not up.empty:
-            ax.scatter(up["x"], up["y"], s=10, color="#d42517", picker=True, pickradius=5)
-        if not down.empty:
-            ax.scatter(down["x"], down["y"], s=10, color="#17d425", picker=True, pickradius=5)
+        # with the lookup callbacks the clicks are resolved by the spatial index, the artists are not pickable, so
+        # matplotlib does not test every point on a click
+        picker = on_pick is None and on_hover is None
+        for label, color in ((Volcano.NORMAL, "#fbb929"), (Volcano.UP, "#d42517"), (Volcano.DOWN, "#17d425")):
+            mask = labels == label
+            if not mask.any():
+                continue
+            if not large:
+                ax.scatter(x[mask], y[mask], s=10, color=color, picker=picker, pickradius=5)
+            elif label != Volcano.NORMAL:
+                ax.scatter(x[mask], y[mask], s=10, color=color, picker=picker, pickradius=5, zorder=2)
+            elif density is None:
+                ax.scatter(x[mask], y[mask], s=10, color=color, rasterized=True, zorder=1)
+            else:
+                cmap = LinearSegmentedColormap.from_list("normal", ["#fef1d4", color])
+                if density == "hexbin":
+                    ax.hexbin(x[mask], y[mask], gridsize=density_grid_size, cmap=cmap, mincnt=1, bins="log",
+                              rasterized=True, zorder=1)
+                else:
+                    ax.hist2d(x[mask], y[mask], bins=density_grid_size, cmap=cmap, cmin=1, norm=LogNorm(),
+                              rasterized=True, zorder=1)
 
         if y_threshold is not None:
             ax.axhline(y=y_threshold, color='black', label="Y Threshold")
@@ -97,11 +155,57 @@ class Volcano:
         if x_min_threshold is not None:
             ax.axvline(x=x_min_threshold, color='black', label="X Min Threshold")
 
-        plt.show()
+        if on_pick is not None or on_hover is not None:
+            Volcano.connect_lookup(fig, ax, data, GridIndex(x, y), on_pick, on_hover, pick_radius)
+
+        if show:
+            plt.show()
+
+        return fig
+
+    @staticmethod
+    def connect_lookup(fig: Figure, ax, data: DataFrame, index: GridIndex,
+                       on_pick: Optional[Callable[[Series], None]], on_hover: Optional[Callable[[Optional[Series]], None]],
+                       pick_radius: float) -> None:
+        """
+        Resolve the mouse events to the nearest row of the data with the spatial index.
+        Args:
+            fig (Figure): The figure.
+            ax (Axes): The axes of the points.
+            data (DataFrame): The data.
+            index (GridIndex): The index of the points.
+            on_pick (Callable): Called with the row nearest to a mouse click.
+            on_hover (Callable): Called with the row nearest to the mouse when it changes.
+            pick_radius (float): The maximum distance in pixels.
+        """
+        def nearest(event) -> Optional[int]:
+            if event.inaxes is not ax or event.xdata is None:
+                return None
+            # the pixels per data unit of the axes at the current zoom
+            (x0, y0), (x1, y1) = ax.transData.transform([(0, 0), (1, 1)])
+            return index.query(event.xdata, event.ydata, pick_radius, (abs(x1 - x0), abs(y1 - y0)))
+
+        if on_pick is not None:
+            def pick(event):
+                i = nearest(event)
+                if i is not None:
+                    on_pick(data.iloc[i])
+
+            fig.canvas.mpl_connect("button_press_event", pick)
+
+        if on_hover is not None:
+            hovered = [None]
+
+            def hover(event):
+                i = nearest(event)
+                if i != hovered[0]:
+                    hovered[0] = i
+                    on_hover(None if i is None else data.iloc[i])
+
+            fig.canvas.mpl_connect("motion_notify_event", hover)
 
 
 if __name__ == '__main__':
-    import numpy as np
     import pandas as pd
 
     data = pd.DataFrame({
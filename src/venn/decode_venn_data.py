@@ -5,26 +5,244 @@
 # @File     : decode_venn_data
 # @Project  : MALDI_Decipher
 # @Desc     :
+import heapq
 import itertools
-from typing import Iterable
+from collections import Counter
+from collections.abc import Mapping
+from typing import Callable, Hashable, Iterable, Iterator
 
 
-def decode_venn_data(data: dict) -> dict[tuple: set]:
+def decode_venn_data(data: dict, sparse: bool = False, backend: str = "python", n_jobs: int = 1,
+                     top_k: int | None = None, min_size: int | None = None,
+                     max_degree: int | None = None) -> dict[tuple: set]:
     """
     Decode the venn data
     :param data: A dictionary where the keys are identifiers and the values are sets
-    :return: A dictionary with keys as combinations of identifiers and values as the intersection sets
+    :param sparse: If True, only the non-empty intersections are emitted, as a VennRegions view which reports the
+                   absent combinations as empty sets
+    :param backend: "python" to decode with python sets, "numpy" to decode with vectorized numpy operations, which is
+                    faster for large sets of integers
+    :param n_jobs: The number of processes decoding shards of the elements with the python backend, -1 for the number
+                   of CPUs. Only the region sizes are counted in parallel, the region sets are grouped serially as
+                   sending them back from the processes costs as much as building them, see decode_venn_counts
+    :param top_k: If given, only the top_k largest intersections are emitted
+    :param min_size: If given, only the intersections with at least min_size elements are emitted
+    :param max_degree: If given, only the combinations of at most max_degree identifiers are emitted
+    :return: A dictionary with keys as combinations of identifiers and values as the intersection sets, the filters
+             imply the sparse output
     """
-    # change the data to set
-    data = {k: set(v) if not isinstance(v, set) else v for k, v in data.items()}
+    groups = cal_groups(data, backend=backend, n_jobs=n_jobs)
+    if top_k is not None or min_size is not None or max_degree is not None:
+        groups = select_groups(groups, size=len, top_k=top_k, min_size=min_size, max_degree=max_degree)
+        sparse = True
 
-    # calculate the level of the data
-    intersections = {}
-    for level in range(len(data), 0, -1):
-        data, intersection = cal_intersection(data.keys(), data, level)
-        intersections.update(intersection)
+    return cal_regions(list(data.keys()), groups, sparse=sparse, default=set)
 
-    return intersections
+
+def decode_venn_counts(data: dict, sparse: bool = False, backend: str = "python", n_jobs: int = 1,
+                       top_k: int | None = None, min_size: int | None = None,
+                       max_degree: int | None = None) -> dict[tuple: int]:
+    """
+    Decode the size of every venn region, without keeping the region sets
+    :param data: A dictionary where the keys are identifiers and the values are sets
+    :param sparse: If True, only the non-empty intersections are emitted, as a VennRegions view which reports the
+                   absent combinations as 0
+    :param backend: "python" or "numpy", see decode_venn_data
+    :param n_jobs: The number of processes counting shards of the elements with the python backend, -1 for the
+                   number of CPUs, data of less than a million elements is counted serially
+    :param top_k: If given, only the top_k largest intersections are emitted
+    :param min_size: If given, only the intersections with at least min_size elements are emitted
+    :param max_degree: If given, only the combinations of at most max_degree identifiers are emitted
+    :return: A dictionary with keys as combinations of identifiers and values as the intersection sizes, the filters
+             imply the sparse output
+    """
+    counts = cal_groups(data, backend=backend, counts_only=True, n_jobs=n_jobs)
+    if top_k is not None or min_size is not None or max_degree is not None:
+        counts = select_groups(counts, top_k=top_k, min_size=min_size, max_degree=max_degree)
+        sparse = True
+
+    return cal_regions(list(data.keys()), counts, sparse=sparse, default=int)
+
+
+def cal_groups(data: dict, backend: str = "python", counts_only: bool = False,
+               n_jobs: int = 1) -> dict[int, set] | dict[int, int]:
+    """
+    Group the elements by their membership mask
+    :param data: A dictionary where the keys are identifiers and the values are sets
+    :param backend: "python" or "numpy"
+    :param counts_only: If True, only the size of every group is calculated
+    :param n_jobs: The number of processes of the python backend, -1 for the number of CPUs
+    :return: A dictionary with membership masks as keys and the exclusive region sets (or their sizes) as values
+    """
+    if n_jobs != 1:
+        if backend != "python":
+            raise Exception("Parallel decoding is only supported by the python backend")
+        from src.venn.decode_venn_parallel import cal_membership_groups_parallel
+        return cal_membership_groups_parallel(data, n_jobs=n_jobs, counts_only=counts_only)
+    if backend == "python":
+        masks = cal_membership(data)
+        return Counter(masks.values()) if counts_only else cal_membership_groups(masks)
+    if backend == "numpy":
+        from src.venn.decode_venn_numpy import cal_membership_groups_numpy
+        return cal_membership_groups_numpy(data, counts_only=counts_only)
+
+    raise Exception(f"Unknown backend: {backend}")
+
+
+def select_groups(groups: dict[int, object], size: Callable = int, top_k: int | None = None,
+                  min_size: int | None = None, max_degree: int | None = None) -> dict[int, object]:
+    """
+    Select the regions by size and degree before they are converted to combinations of identifiers
+    :param groups: A dictionary with membership masks as keys and the region values as values
+    :param size: Function returning the size of a region value
+    :param top_k: If given, only the top_k largest regions are kept, ties are kept in the order of the combinations
+    :param min_size: If given, only the regions with at least min_size elements are kept
+    :param max_degree: If given, only the regions of at most max_degree sets are kept
+    :return: The selected groups
+    """
+    masks = (m for m in groups
+             if (min_size is None or size(groups[m]) >= min_size) and (max_degree is None or m.bit_count() <= max_degree))
+    if top_k is not None:
+        masks = heapq.nsmallest(top_k, masks, key=lambda m: (-size(groups[m]), -m.bit_count(), mask_to_index(m)))
+
+    return {mask: groups[mask] for mask in masks}
+
+
+def cal_regions(labels: list, groups: dict[int, object], sparse: bool = False,
+                default: Callable = set) -> dict[tuple, object]:
+    """
+    Convert the regions keyed by membership mask to regions keyed by combinations of identifiers
+    :param labels: The identifiers, in the order of the mask bits
+    :param groups: A dictionary with membership masks as keys and the region values as values
+    :param sparse: If True, only the masks in the groups are emitted, as a VennRegions view
+    :param default: Factory of the value of an empty region
+    :return: A dictionary with keys as combinations of identifiers, ordered level by level from the largest
+             combination, and values as the region values
+    """
+    if sparse:
+        order = sorted(groups, key=lambda m: (-m.bit_count(), mask_to_index(m)))
+        return VennRegions(labels, {mask_to_key(mask, labels): groups[mask] for mask in order}, default=default)
+
+    # emit the combinations in the same order as the level by level decoding
+    regions = {}
+    for level in range(len(labels), 0, -1):
+        for combination in itertools.combinations(range(len(labels)), level):
+            mask = sum(1 << i for i in combination)
+            value = groups.get(mask)
+            regions[tuple(labels[i] for i in combination)] = default() if value is None else value
+
+    return regions
+
+
+def mask_to_index(mask: int) -> tuple[int, ...]:
+    """
+    Convert the membership mask to the indexes of the sets
+    :param mask: The membership mask
+    :return: The indexes of the set bits, in ascending order
+    """
+    index = []
+    i = 0
+    while mask:
+        if mask & 1:
+            index.append(i)
+        mask >>= 1
+        i += 1
+    return tuple(index)
+
+
+def mask_to_key(mask: int, labels: list) -> tuple:
+    """
+    Convert the membership mask to the combination of identifiers
+    :param mask: The membership mask
+    :param labels: The identifiers, in the order of the mask bits
+    :return: The combination of identifiers
+    """
+    return tuple(labels[i] for i in mask_to_index(mask))
+
+
+class VennRegions(Mapping):
+    """
+    Sparse venn regions, only the non-empty regions are stored and iterated. Looking up a combination which is not
+    stored returns an empty region, looking up anything else raises KeyError.
+    """
+
+    def __init__(self, labels: list, regions: dict[tuple, object], default: Callable = set):
+        """
+        :param labels: The identifiers, in the order of the mask bits
+        :param regions: A dictionary with the non-empty combinations as keys and the regions as values
+        :param default: Factory of the value of an empty region
+        """
+        self.labels = tuple(labels)
+        self._index = {label: i for i, label in enumerate(self.labels)}
+        self._regions = regions
+        self._default = default
+
+    def __getitem__(self, key: tuple) -> object:
+        value = self._regions.get(key)
+        if value is not None:
+            return value
+        if not self.is_combination(key):
+            raise KeyError(key)
+        return self._default()
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._regions
+
+    def __iter__(self) -> Iterator[tuple]:
+        return iter(self._regions)
+
+    def __len__(self) -> int:
+        return len(self._regions)
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({self._regions!r})"
+
+    def is_combination(self, key: object) -> bool:
+        """
+        Check if the key is a combination of the identifiers, in the order of the identifiers
+        :param key: The key to check
+        :return: True if the key is a valid combination
+        """
+        if not isinstance(key, tuple) or not key:
+            return False
+        try:
+            index = [self._index[k] for k in key]
+        except (KeyError, TypeError):
+            return False
+        return all(i < j for i, j in zip(index, index[1:]))
+
+
+def cal_membership(data: dict) -> dict[Hashable, int]:
+    """
+    Calculate the membership mask of every element
+    :param data: A dictionary where the keys are identifiers and the values are sets
+    :return: A dictionary with elements as keys and the bitmask of the sets containing them as values,
+             bit i is set when the element is in the i-th set of the data
+    """
+    masks = {}
+    for i, value in enumerate(data.values()):
+        bit = 1 << i
+        for ele in value:
+            masks[ele] = masks.get(ele, 0) | bit
+
+    return masks
+
+
+def cal_membership_groups(masks: dict[Hashable, int]) -> dict[int, set]:
+    """
+    Group the elements by their membership mask
+    :param masks: A dictionary with elements as keys and membership masks as values
+    :return: A dictionary with membership masks as keys and the exclusive region sets as values
+    """
+    groups = {}
+    for ele, mask in masks.items():
+        group = groups.get(mask)
+        if group is None:
+            groups[mask] = {ele}
+        else:
+            group.add(ele)
+
+    return groups
 
 
 def cal_intersection(elements: Iterable, data: dict, level: int) -> tuple[dict, dict[tuple, set]]:
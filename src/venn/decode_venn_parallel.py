@@ -0,0 +1,113 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Author   : zhyemqww
+# @Time     : 2026/10/18 22:05
+# @File     : decode_venn_parallel
+# @Project  : Toolbox
+# @Desc     : process parallel venn decoding
+import multiprocessing
+import os
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+from src.venn.decode_venn_data import cal_membership, cal_membership_groups
+
+# the total number of elements below which the process pool costs more than it saves, the data is decoded serially
+MIN_PARALLEL_SIZE = 1_000_000
+
+# the shards of the data being decoded, inherited by the forked workers
+_shards = None
+
+
+def cal_membership_groups_parallel(data: dict, n_jobs: int = -1,
+                                   counts_only: bool = False) -> dict[int, set] | dict[int, int]:
+    """
+    Group the elements by their membership mask in a process pool. The elements are split into one shard per worker
+    by their hash in a single pass, before the workers are forked, so the workers inherit their shard instead of
+    receiving it pickled, and every worker only builds the masks of the elements of its shard. The workers return the
+    region sizes of their shard, which are disjoint and summed. The region sets are grouped serially, since sending
+    them back from the workers costs as much as building them. Small data, and platforms without fork, are decoded
+    serially as well.
+    :param data: A dictionary where the keys are identifiers and the values are sets
+    :param n_jobs: The number of worker processes, -1 for the number of CPUs
+    :param counts_only: If True, only the size of every group is calculated
+    :return: A dictionary with membership masks as keys and the exclusive region sets (or their sizes) as values
+    """
+    if n_jobs == -1:
+        n_jobs = os.cpu_count() or 1
+    if n_jobs < 1:
+        raise Exception("n_jobs must be positive or -1")
+
+    values = list(data.values())
+    if (n_jobs == 1 or not counts_only or sum(len(value) for value in values) < MIN_PARALLEL_SIZE
+            or "fork" not in multiprocessing.get_all_start_methods()):
+        masks = cal_membership(data)
+        return Counter(masks.values()) if counts_only else cal_membership_groups(masks)
+
+    with ProcessPoolExecutor(n_jobs, mp_context=multiprocessing.get_context("fork"),
+                             initializer=init_worker, initargs=(split_shards(values, n_jobs),)) as executor:
+        # the shards are disjoint, so the sizes of the same mask are summed
+        counts = Counter()
+        for result in executor.map(count_shard, range(n_jobs)):
+            counts.update(result)
+
+    return counts
+
+
+def split_shards(values: list, n_shards: int) -> list[list[list]]:
+    """
+    Split the sets into shards by the hash of the elements, the same element is in the same shard of every set
+    :param values: The sets of the data
+    :param n_shards: The number of shards
+    :return: The elements of every set in every shard
+    """
+    shards = [[[] for _ in values] for _ in range(n_shards)]
+    for i, value in enumerate(values):
+        appends = [shard[i].append for shard in shards]
+        for ele in value:
+            appends[hash(ele) % n_shards](ele)
+    return shards
+
+
+def init_worker(shards: list) -> None:
+    """
+    Keep the shards in the worker process
+    :param shards: The elements of every set in every shard
+    """
+    global _shards
+    _shards = shards
+
+
+def count_shard(shard: int) -> Counter:
+    """
+    Count the elements of one shard by their membership mask
+    :param shard: The index of the shard
+    :return: A dictionary with membership masks as keys and the region sizes of the shard as values
+    """
+    masks = {}
+    for i, elements in enumerate(_shards[shard]):
+        bit = 1 << i
+        for ele in elements:
+            masks[ele] = masks.get(ele, 0) | bit
+
+    return Counter(masks.values())
+
+
+if __name__ == '__main__':
+    import random
+    import time
+
+    from src.venn.decode_venn_data import decode_venn_counts
+
+    rng = random.Random(0)
+    da = {f"s{i}": set(rng.sample(range(2_000_000), 500_000)) for i in range(20)}
+
+    t = time.perf_counter()
+    serial = decode_venn_counts(da, sparse=True)
+    print(f"serial: {time.perf_counter() - t:.3f}s")
+
+    for jobs in (2, 4, 8):
+        t = time.perf_counter()
+        parallel = decode_venn_counts(da, sparse=True, n_jobs=jobs)
+        print(f"{jobs} jobs: {time.perf_counter() - t:.3f}s")
+        assert parallel == serial
@@ -0,0 +1,310 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Author   : zhyemqww
+# @Time     : 2026/10/18 20:05
+# @File     : decode_venn_stream
+# @Project  : Toolbox
+# @Desc     : incremental venn decoding from iterables and files
+import heapq
+import itertools
+import os
+from collections import Counter, namedtuple
+from typing import Hashable, Iterable, Iterator
+
+from src.venn.decode_venn_data import cal_regions, cal_membership_groups, select_groups
+
+# a column of a delimited file, the column is an index or the name of a column in the header line
+ColumnSource = namedtuple("ColumnSource", ["path", "column"])
+
+
+class VennDecoder:
+    """
+    Incremental venn decoder. The elements are fed chunk by chunk, the membership mask of every element and the size
+    of every region are updated as the chunks arrive, so the input sets never have to be materialized. Sets can also
+    be removed again, every update costs time proportional to the number of elements in the chunk. Every set occupies
+    a bit slot of the masks, the slot of a removed set is reused, while the identifiers are kept in the order they
+    were added, like the keys of a dictionary.
+    """
+
+    def __init__(self, keep_members: bool = False):
+        """
+        :param keep_members: If True, the element set of every region is maintained as well
+        """
+        # the slot of every identifier, in the order the identifiers were added
+        self.slots = {}
+        self.free_slots = []
+        self.masks = {}
+        self.region_counts = Counter()
+        self.groups = {} if keep_members else None
+        # the masks of the regions changed since the last pop_changes, and the combinations of the regions emptied
+        # by removed identifiers
+        self.changed = set()
+        self.emptied = []
+
+    @classmethod
+    def from_masks(cls, labels: list, masks: dict[Hashable, int], keep_members: bool = False) -> "VennDecoder":
+        """
+        Build a decoder from the membership masks of decoded sets, without feeding the sets again
+        :param labels: The identifiers, bit i of the masks is the i-th identifier
+        :param masks: A dictionary with elements as keys and membership masks as values, it is owned by the decoder
+        :param keep_members: If True, the element set of every region is maintained as well
+        :return: The decoder, with no pending changes
+        """
+        decoder = cls(keep_members=keep_members)
+        decoder.slots = {label: i for i, label in enumerate(labels)}
+        decoder.masks = masks
+        decoder.region_counts = Counter(masks.values())
+        if keep_members:
+            decoder.groups = cal_membership_groups(masks)
+        return decoder
+
+    @property
+    def labels(self) -> list:
+        """
+        The identifiers, in the order they were added
+        """
+        return list(self.slots)
+
+    def add_label(self, label: Hashable) -> int:
+        """
+        Register an identifier, the lowest slot of a removed identifier is reused
+        :param label: The identifier of the set
+        :return: The bit of the set in the membership masks
+        """
+        slot = self.slots.get(label)
+        if slot is None:
+            slot = heapq.heappop(self.free_slots) if self.free_slots else len(self.slots)
+            self.slots[label] = slot
+        return 1 << slot
+
+    def update(self, label: Hashable, items: Iterable) -> None:
+        """
+        Add a chunk of elements to a set
+        :param label: The identifier of the set
+        :param items: The elements
+        """
+        bit = self.add_label(label)
+        masks = self.masks
+        for item in items:
+            mask = masks.get(item, 0)
+            if mask & bit:
+                continue
+            masks[item] = mask | bit
+            self._move(item, mask, mask | bit)
+
+    def remove(self, label: Hashable, items: Iterable) -> None:
+        """
+        Remove a chunk of elements from a set
+        :param label: The identifier of the set
+        :param items: The elements
+        """
+        if label not in self.slots:
+            raise KeyError(label)
+        bit = 1 << self.slots[label]
+        masks = self.masks
+        for item in items:
+            mask = masks.get(item, 0)
+            if not mask & bit:
+                continue
+            if mask == bit:
+                del masks[item]
+            else:
+                masks[item] = mask & ~bit
+            self._move(item, mask, mask & ~bit)
+
+    def remove_label(self, label: Hashable, items: Iterable) -> None:
+        """
+        Remove a set
+        :param label: The identifier of the set
+        :param items: All elements of the set
+        """
+        self.remove(label, items)
+        bit = 1 << self.slots[label]
+
+        # the changed regions of the set are empty now, their combinations still name the identifier
+        emptied = [mask for mask in self.changed if mask & bit]
+        self.emptied.extend(self.to_key(mask) for mask in emptied)
+        self.changed.difference_update(emptied)
+
+        heapq.heappush(self.free_slots, self.slots.pop(label))
+
+    def _move(self, item: Hashable, old: int, new: int) -> None:
+        """
+        Move an element from the region of the old mask to the region of the new mask
+        """
+        region_counts = self.region_counts
+        if old:
+            if region_counts[old] == 1:
+                del region_counts[old]
+            else:
+                region_counts[old] -= 1
+            self.changed.add(old)
+        if new:
+            region_counts[new] += 1
+            self.changed.add(new)
+
+        if self.groups is not None:
+            if old:
+                group = self.groups[old]
+                group.discard(item)
+                if not group:
+                    del self.groups[old]
+            if new:
+                self.groups.setdefault(new, set()).add(item)
+
+    def to_key(self, mask: int) -> tuple:
+        """
+        Convert a membership mask to the combination of identifiers, in the order of the identifiers
+        :param mask: The membership mask of the slots
+        :return: The combination
+        """
+        return tuple(label for label, slot in self.slots.items() if mask >> slot & 1)
+
+    def pop_changes(self) -> list[tuple[tuple, int, set | None]]:
+        """
+        The regions changed since the last call, the cost is proportional to the number of changed regions
+        :return: (combination, size, element set) of every changed region, the size of an emptied region is 0, the
+                 element sets are the live region sets if the members are maintained, otherwise None. A combination
+                 may appear twice, the later one is valid.
+        """
+        changes = [(key, 0, None if self.groups is None else set()) for key in self.emptied]
+        for mask in self.changed:
+            group = None if self.groups is None else self.groups.get(mask, set())
+            changes.append((self.to_key(mask), self.region_counts.get(mask, 0), group))
+        self.changed.clear()
+        self.emptied.clear()
+        return changes
+
+    def feed(self, label: Hashable, source: Iterable | str | os.PathLike | ColumnSource, chunk_size: int = 100_000,
+             sep: str | None = None) -> None:
+        """
+        Add all elements of a source to a set, chunk by chunk
+        :param label: The identifier of the set
+        :param source: An iterable of elements, a file path with one element per line, or a ColumnSource
+        :param chunk_size: The number of elements per chunk
+        :param sep: The column separator of the file, None to split on whitespace
+        """
+        for chunk in read_chunks(source, chunk_size=chunk_size, sep=sep):
+            self.update(label, chunk)
+
+    def counts(self, sparse: bool = False, **filters) -> dict[tuple, int]:
+        """
+        The size of every region
+        :param sparse: If True, only the non-empty regions are emitted
+        :param filters: top_k, min_size and max_degree, see decode_venn_counts
+        :return: A dictionary with keys as combinations of identifiers and values as the intersection sizes
+        """
+        labels, groups = self._compact(self.region_counts)
+        if any(v is not None for v in filters.values()):
+            groups = select_groups(groups, **filters)
+            sparse = True
+        return cal_regions(labels, groups, sparse=sparse, default=int)
+
+    def regions(self, sparse: bool = False, **filters) -> dict[tuple, set]:
+        """
+        The element set of every region. When the members are maintained, the returned sets are the live region sets
+        and change with later updates.
+        :param sparse: If True, only the non-empty regions are emitted
+        :param filters: top_k, min_size and max_degree, see decode_venn_data
+        :return: A dictionary with keys as combinations of identifiers and values as the intersection sets
+        """
+        groups = self.groups if self.groups is not None else cal_membership_groups(self.masks)
+        labels, groups = self._compact(groups)
+        if any(v is not None for v in filters.values()):
+            groups = select_groups(groups, size=len, **filters)
+            sparse = True
+        return cal_regions(labels, groups, sparse=sparse, default=set)
+
+    def _compact(self, groups: dict[int, object]) -> tuple[list, dict[int, object]]:
+        """
+        Renumber the masks from the slots to the order of the identifiers
+        :param groups: A dictionary with membership masks of the slots as keys
+        :return: The labels and the groups keyed by the masks in the order of the identifiers
+        """
+        slots = list(self.slots.values())
+        if slots == list(range(len(slots))):
+            return self.labels, dict(groups)
+
+        compacted = {}
+        for mask, value in groups.items():
+            compacted[sum(1 << j for j, i in enumerate(slots) if mask >> i & 1)] = value
+        return self.labels, compacted
+
+
+def decode_venn_stream(sources: dict, counts_only: bool = False, sparse: bool = False, chunk_size: int = 100_000,
+                       sep: str | None = None) -> dict[tuple, set] | dict[tuple, int]:
+    """
+    Decode the venn data from iterables or files without loading the sets at once
+    :param sources: A dictionary where the keys are identifiers and the values are iterables of elements, file paths
+                    with one element per line, or ColumnSource columns of delimited files
+    :param counts_only: If True, only the size of every region is returned
+    :param sparse: If True, only the non-empty regions are emitted
+    :param chunk_size: The number of elements read per chunk
+    :param sep: The column separator of the files, None to split on whitespace
+    :return: A dictionary with keys as combinations of identifiers and values as the intersection sets or sizes
+    """
+    decoder = VennDecoder()
+    for label, source in sources.items():
+        decoder.feed(label, source, chunk_size=chunk_size, sep=sep)
+
+    return decoder.counts(sparse=sparse) if counts_only else decoder.regions(sparse=sparse)
+
+
+def read_chunks(source: Iterable | str | os.PathLike | ColumnSource, chunk_size: int = 100_000,
+                sep: str | None = None) -> Iterator[list]:
+    """
+    Read the elements of a source chunk by chunk
+    :param source: An iterable of elements, a file path with one element per line, or a ColumnSource, other
+                   tuples are iterables of elements
+    :param chunk_size: The number of elements per chunk
+    :param sep: The column separator of the file, None to split on whitespace
+    :return: An iterator of chunks of elements
+    """
+    if isinstance(source, (str, os.PathLike)):
+        items = read_lines(source)
+    elif isinstance(source, ColumnSource):
+        items = read_column(source.path, source.column, sep=sep)
+    else:
+        items = iter(source)
+
+    while True:
+        chunk = list(itertools.islice(items, chunk_size))
+        if not chunk:
+            break
+        yield chunk
+
+
+def read_lines(path: str | os.PathLike) -> Iterator[str]:
+    """
+    Read the elements of a file, one element per line, blank lines are skipped
+    :param path: The file path
+    :return: An iterator of elements
+    """
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                yield line
+
+
+def read_column(path: str | os.PathLike, column: int | str, sep: str | None = None) -> Iterator[str]:
+    """
+    Read the elements of a column of a delimited file, empty cells are skipped
+    :param path: The file path
+    :param column: The index of the column, or the name of the column in the header line
+    :param sep: The column separator, None to split on whitespace
+    :return: An iterator of elements
+    """
+    with open(path, encoding="utf-8") as f:
+        if isinstance(column, str):
+            header = f.readline().rstrip("\r\n").split(sep)
+            if column not in header:
+                raise Exception(f"The column {column} is not in the header of {path}")
+            column = header.index(column)
+
+        for line in f:
+            cells = line.rstrip("\r\n").split(sep)
+            if column < len(cells):
+                cell = cells[column].strip()
+                if cell:
+                    yield cell
@@ -0,0 +1,167 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Author   : zhyemqww
+# @Time     : 2026/10/19 02:30
+# @File     : lens_table
+# @Project  : Toolbox
+# @Desc     : precomputed lookup table of the lens area inversion
+import os
+
+import numpy as np
+
+from src.venn.venn_utils import cal_distance_batch
+
+# the tables built or loaded in this process, keyed by (path, size)
+_tables = {}
+
+
+class LensTable:
+    """
+    Lookup table of the circle distance for a lens area. With the radius of the larger circle scaled to 1, the distance
+    only depends on the radius ratio rho = r_small / r_large and the overlap fraction f = a / (pi * r_small ^ 2) of the
+    smaller circle. The table holds the position t = (d - (1 - rho)) / (2 * rho) of the distance within its bracket
+    [1 - rho, 1 + rho] on a regular (rho, f) grid, the lookup interpolates it bilinearly and refines it with the
+    newton iteration of cal_distance_batch.
+    """
+
+    def __init__(self, table: np.ndarray):
+        """
+        :param table: The positions t, rows are the radius ratios and columns the overlap fractions from 0 to 1
+        """
+        table = np.asarray(table, dtype=float)
+        if table.ndim != 2 or min(table.shape) < 2:
+            raise Exception("The lens table must be a 2d array of at least 2 x 2")
+        self.table = table
+
+    @classmethod
+    def build(cls, size: int = 129) -> "LensTable":
+        """
+        Solve the distances of the grid points
+        :param size: The number of grid points along the radius ratio and the overlap fraction
+        :return: The table
+        """
+        # the ratio 0 is approximated by a tiny circle, which sees the border of the large circle as a line
+        rho = np.maximum(np.linspace(0, 1, size), 1e-4)[:, None]
+        f = np.linspace(0, 1, size)[None, :]
+        a = f * np.pi * rho ** 2
+        _, _, d = cal_distance_batch(np.pi - a, np.pi * rho ** 2 - a, a, normalization=False)
+        return cls(np.clip((d - (1 - rho)) / (2 * rho), 0, 1))
+
+    @classmethod
+    def load(cls, path: str | os.PathLike) -> "LensTable":
+        """
+        Load a table saved by save
+        :param path: The file path
+        :return: The table
+        """
+        return cls(np.load(path))
+
+    def save(self, path: str | os.PathLike) -> None:
+        """
+        Save the table as a compact float32 numpy array, the refinement recovers the lost precision
+        :param path: The file path, ".npy" is appended if it is missing
+        """
+        np.save(path, self.table.astype(np.float32))
+
+    def lookup(self, rho: np.ndarray, f: np.ndarray) -> np.ndarray:
+        """
+        Interpolate the positions of the distances within their brackets
+        :param rho: radius ratios in [0, 1]
+        :param f: overlap fractions in [0, 1]
+        :return: positions t in [0, 1]
+        """
+        n_rho, n_f = self.table.shape
+        x = np.clip(np.asarray(rho, dtype=float), 0, 1) * (n_rho - 1)
+        y = np.clip(np.asarray(f, dtype=float), 0, 1) * (n_f - 1)
+        i = np.minimum(x.astype(int), n_rho - 2)
+        j = np.minimum(y.astype(int), n_f - 2)
+        u, v = x - i, y - j
+        table = self.table
+        return ((1 - u) * (1 - v) * table[i, j] + u * (1 - v) * table[i + 1, j] +
+                (1 - u) * v * table[i, j + 1] + u * v * table[i + 1, j + 1])
+
+    def cal_distance(self, s1: np.ndarray, s2: np.ndarray, a: np.ndarray, tol: float = 1e-12,
+                     max_iteration: int = 100, normalization: bool = True, full_output: bool = False) -> tuple:
+        """
+        Calculate the distances between pairs of circles from the table, see cal_distance_batch
+        :param s1: exclusive areas of the first circles
+        :param s2: exclusive areas of the second circles
+        :param a: intersection areas
+        :param tol: tolerance of the intersection areas of the refinement, relative to the squared radii of the smaller
+                    circles
+        :param max_iteration: maximum number of refinement iterations
+        :param normalization: If True, the radius of the larger circle of every pair is scaled to 1
+        :param full_output: If True, the convergence information of every pair is returned as well
+        :return: r1, r2, distance arrays, and a SolverInfo of arrays if full_output is True
+        """
+        s1, s2, a = np.broadcast_arrays(np.asarray(s1, dtype=float), np.asarray(s2, dtype=float),
+                                        np.asarray(a, dtype=float))
+        r1 = np.sqrt(np.maximum(s1 + a, 0) / np.pi)
+        r2 = np.sqrt(np.maximum(s2 + a, 0) / np.pi)
+        large = np.maximum(r1, r2)
+        small = np.minimum(r1, r2)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            rho = np.where(large > 0, small / large, 1.0)
+            f = np.where(small > 0, a / (np.pi * small ** 2), 0.0)
+
+        initial = (1 - rho + 2 * rho * self.lookup(rho, f)) * (1 if normalization else large)
+        return cal_distance_batch(s1, s2, a, tol=tol, max_iteration=max_iteration, normalization=normalization,
+                                  full_output=full_output, initial=initial)
+
+
+def get_lens_table(path: str | os.PathLike | None = None, size: int = 129) -> LensTable:
+    """
+    Get the lens table, it is built once per process. With a path, the table is loaded from the file, or built and
+    saved to the file if it does not exist yet or holds a table of another size.
+    :param path: The file path of the table, ".npy" is appended if it is missing, None to keep the table in memory only
+    :param size: The number of grid points along the radius ratio and the overlap fraction of a built table
+    :return: The table
+    """
+    if path is not None:
+        # np.save appends the extension, the file is looked up under the name it is saved as
+        path = os.fspath(path)
+        if not path.endswith(".npy"):
+            path += ".npy"
+    key = (path, size)
+    if key in _tables:
+        return _tables[key]
+
+    table = None
+    if path is not None and os.path.exists(path):
+        table = LensTable.load(path)
+        if table.table.shape != (size, size):
+            table = None
+    if table is None:
+        table = LensTable.build(size)
+        if path is not None:
+            table.save(path)
+    _tables[key] = table
+    return table
+
+
+def cal_distance_table(s1: np.ndarray, s2: np.ndarray, a: np.ndarray, tol: float = 1e-12, max_iteration: int = 100,
+                       normalization: bool = True, full_output: bool = False,
+                       path: str | os.PathLike | None = None) -> tuple:
+    """
+    Calculate the distances between pairs of circles with the lens table of the process, see LensTable.cal_distance
+    :param path: The file path of the table, see get_lens_table
+    :return: r1, r2, distance arrays, and a SolverInfo of arrays if full_output is True
+    """
+    return get_lens_table(path).cal_distance(s1, s2, a, tol=tol, max_iteration=max_iteration,
+                                             normalization=normalization, full_output=full_output)
+
+
+if __name__ == '__main__':
+    import time
+
+    t = time.perf_counter()
+    lens_table = LensTable.build()
+    print(f"build: {time.perf_counter() - t:.3f}s")
+
+    rng = np.random.default_rng(0)
+    s1_, s2_, a_ = rng.uniform(0, 1000, (3, 100_000))
+    for name, solve in (("newton", cal_distance_batch), ("table", lens_table.cal_distance)):
+        t = time.perf_counter()
+        *_, info = solve(s1_, s2_, a_, full_output=True)
+        print(f"{name}: {time.perf_counter() - t:.3f}s, mean iterations {info.iterations.mean():.2f}, "
+              f"max residual {info.residual.max():.2e}")
@@ -5,12 +5,20 @@
 # @File     : upset
 # @Project  : Toolbox
 # @Desc     :
-from typing import Iterable
+from __future__ import annotations
+
+import bisect
+import math
+from typing import TYPE_CHECKING, Iterable
 
 import numpy as np
-from matplotlib import pyplot as plt, gridspec
 
-from src.venn.decode_venn_data import decode_venn_data
+from src.venn.decode_venn_data import VennRegions, cal_membership, decode_venn_data, decode_venn_counts
+from src.venn.decode_venn_stream import VennDecoder
+from src.venn.venn_cache import decode_cache
+
+if TYPE_CHECKING:
+    from matplotlib.figure import Figure
 
 
 class Upset:
@@ -18,19 +26,35 @@ class Upset:
     Upset plot.
     """
     def __init__(self):
+        self.data = None
+        self.decoder = None
+        self.decode_options = None
+        self.set_size = None
         self.set_size_sorted = None
         self.set_size_sorted_index = None
-        self.intersections = None
+        self._intersections = None
+        self.intersection_size = None
         self.intersection_count = None
         self.intersection_order = None
-        self.intersection_matrix = None
+        # the sort keys of the intersection order and the ranks of the sets in them, see sort_key
+        self.intersection_sort_keys = None
+        self.set_ranks = None
+        self._intersection_matrix = None
+        # the intersection sets owned by the incremental updates, the decoded ones may be shared by the cache
+        self._regions = None
 
     def decode_data(self, data: dict[str: set],
                     intersection_sort: bool = True,
                     intersection_sort_reverse: bool = True,
                     set_sort: bool = True,
                     set_sort_reverse: bool = True,
-                    ignore_empty_set: bool = True) -> None:
+                    ignore_empty_set: bool = True,
+                    keep_members: bool = True,
+                    backend: str = "python",
+                    cache: bool = False,
+                    top_k: int | None = None,
+                    min_size: int | None = None,
+                    max_degree: int | None = None) -> None:
         """
         decode data to generate venn data
         Args:
@@ -40,43 +64,256 @@ class Upset:
             set_sort (bool): if sort the set according to the size
             set_sort_reverse (bool): if sort the set in reverse order
             ignore_empty_set (bool): if ignore the empty set
+            keep_members (bool): if keep the element sets of the intersections, otherwise only the intersection sizes
+                are decoded and self.intersections is decoded on the first access
+            backend (str): the decoding backend, "python" or "numpy"
+            cache (bool): if memoize the decoding by the content of the data, the cached intersections are shared and
+                must not be modified
+            top_k (int | None): if only keep the top_k largest intersections
+            min_size (int | None): if only keep the intersections with at least min_size elements
+            max_degree (int | None): if only keep the intersections of at most max_degree sets
 
         Returns:
 
         """
         # convert the data to the intersection set
-        data = {k: set(v) for k, v in data.items()}
+        self.data = {k: set(v) for k, v in data.items()}
+        self.decoder = None
+        self._regions = None
+        self.decode_options = {"intersection_sort": intersection_sort,
+                               "intersection_sort_reverse": intersection_sort_reverse,
+                               "set_sort": set_sort,
+                               "set_sort_reverse": set_sort_reverse,
+                               "ignore_empty_set": ignore_empty_set,
+                               "keep_members": keep_members,
+                               "filters": {"top_k": top_k, "min_size": min_size, "max_degree": max_degree}}
+
+        # decode the intersection set
+        if keep_members:
+            decode = decode_cache.decode_venn_data if cache else decode_venn_data
+            self._intersections = decode(self.data, sparse=ignore_empty_set, backend=backend,
+                                        top_k=top_k, min_size=min_size, max_degree=max_degree)
+            self.intersection_size = {k: len(v) for k, v in self._intersections.items()}
+        else:
+            decode = decode_cache.decode_venn_counts if cache else decode_venn_counts
+            self._intersections = None
+            self.intersection_size = dict(decode(self.data, sparse=ignore_empty_set, backend=backend,
+                                                 top_k=top_k, min_size=min_size, max_degree=max_degree))
+
+        self.sort_data()
+
+    def add_set(self, name: str, items: Iterable) -> None:
+        """
+        add a set to the decoded data, only the regions touched by the set are updated
+        Args:
+            name (str): the name of the set, an existing set with the same name is replaced and moved to the end
+            items (Iterable): the elements of the set
+
+        Returns:
+
+        """
+        if name in self.data:
+            self.remove_set(name)
+
+        decoder = self.get_decoder()
+        self.data[name] = set(items)
+        decoder.update(name, self.data[name])
+        self.update_intersections()
+
+    def remove_set(self, name: str) -> None:
+        """
+        remove a set from the decoded data, only the regions touched by the set are updated
+        Args:
+            name (str): the name of the set
+
+        Returns:
+
+        """
+        decoder = self.get_decoder()
+        decoder.remove_label(name, self.data.pop(name))
+        self.update_intersections()
+
+    @property
+    def intersections(self) -> dict[tuple, set] | None:
+        """
+        the element sets of the intersections, after a counts-only decoding they are decoded on the first access and
+        kept until the next update
+        """
+        if self._intersections is None and self.data is not None:
+            self._intersections = self.decode_members()
+        return self._intersections
+
+    def decode_members(self) -> dict[tuple, set]:
+        """
+        decode the element sets of the intersections of the current sets, with the options of the decoding
+        Returns:
+            dict: the intersections as keys and their element sets as values
+        """
+        options = self.decode_options
+        if self.decoder is not None:
+            return self.decoder.regions(sparse=options["ignore_empty_set"], **options["filters"])
+        return decode_venn_data(self.data, sparse=options["ignore_empty_set"], **options["filters"])
+
+    def get_decoder(self) -> VennDecoder:
+        """
+        get the incremental decoder of the decoded data, it is built on the first update
+        Returns:
+            VennDecoder: the incremental decoder
+        """
+        if self.data is None:
+            raise Exception("The data must be decoded before updating the sets")
+
+        if self.decoder is None:
+            # the regions of the masks are already decoded, only the later updates change them
+            self.decoder = VennDecoder.from_masks(list(self.data), cal_membership(self.data),
+                                                  keep_members=self.decode_options["keep_members"])
+        return self.decoder
+
+    def update_intersections(self) -> None:
+        """
+        apply the changed intersections of the incremental decoder, only the changed intersections are sorted again.
+        With filters, or with the empty intersections kept, all intersections are read from the decoder again.
+        Returns:
+
+        """
+        options = self.decode_options
+        changes = self.decoder.pop_changes()
+        sparse = options["ignore_empty_set"]
+        filters = options["filters"]
+        if not sparse or any(v is not None for v in filters.values()):
+            self._regions = None
+            if options["keep_members"]:
+                self._intersections = self.decoder.regions(sparse=sparse, **filters)
+                self.intersection_size = {k: len(v) for k, v in self._intersections.items()}
+            else:
+                self._intersections = None
+                self.intersection_size = dict(self.decoder.counts(sparse=sparse, **filters))
+            self.sort_data()
+            return
+
+        # the element sets decoded on access after a counts-only decoding are out of date
+        if not options["keep_members"]:
+            self._intersections = None
+        elif self._regions is None:
+            self._regions = dict(self._intersections)
+
+        # the sets keep their ranks, a new set is ranked last, a removed set after its intersections are removed
+        for name in self.data:
+            if name not in self.set_ranks:
+                self.set_ranks[name] = max(self.set_ranks.values(), default=-1) + 1
+        self.sort_sets()
+
+        for key, size, members in changes:
+            if key in self.intersection_size:
+                index = bisect.bisect_left(self.intersection_sort_keys, self.sort_key(key))
+                del self.intersection_sort_keys[index]
+                del self.intersection_order[index]
+                del self.intersection_size[key]
+                if self._regions is not None:
+                    del self._regions[key]
+            if size:
+                self.intersection_size[key] = size
+                if self._regions is not None:
+                    self._regions[key] = members
+                sort_key = self.sort_key(key)
+                index = bisect.bisect_left(self.intersection_sort_keys, sort_key)
+                self.intersection_sort_keys.insert(index, sort_key)
+                self.intersection_order.insert(index, key)
+
+        for name in [name for name in self.set_ranks if name not in self.data]:
+            del self.set_ranks[name]
+        if self._regions is not None:
+            self._intersections = VennRegions(list(self.data), self._regions)
+        self.intersection_count = len(self.intersection_size)
+        self._intersection_matrix = None
+
+    def sort_data(self) -> None:
+        """
+        sort the sets and the intersections, the intersection matrix is created on the first access
+        Returns:
+
+        """
+        self.set_ranks = {name: i for i, name in enumerate(self.data)}
+        self.sort_sets()
+
+        self.intersection_count = len(self.intersection_size)
+
+        # sort the intersection set, the intersections of the same size in the order of the decoding
+        self.intersection_sort_keys = sorted(self.sort_key(key) for key in self.intersection_size)
+        self.intersection_order = [key[-1] for key in self.intersection_sort_keys]
+        self._intersection_matrix = None
+
+    def sort_sets(self) -> None:
+        """
+        sort the sets by their size
+        Returns:
+
+        """
+        options = self.decode_options
+        self.set_size = {k: len(v) for k, v in self.data.items()}
 
         # sort the data set
-        if set_sort:
-            self.set_size_sorted = sorted(data, key=lambda x: len(data[x]), reverse=set_sort_reverse)
+        if options["set_sort"]:
+            self.set_size_sorted = sorted(self.set_size, key=self.set_size.get, reverse=options["set_sort_reverse"])
         else:
-            self.set_size_sorted = list(data.keys())
+            self.set_size_sorted = list(self.set_size.keys())
 
         self.set_size_sorted_index = {s: len(self.set_size_sorted) - i for i, s in enumerate(self.set_size_sorted)}
+        self._intersection_matrix = None
 
-        # sort the intersection set
-        self.intersections = decode_venn_data(data)
-
-        if ignore_empty_set:
-            self.intersections = {k: v for k, v in self.intersections.items() if v}
-        self.intersection_count = len(self.intersections)
+    def sort_key(self, key: tuple) -> tuple:
+        """
+        the sort key of an intersection, by its size if the intersections are sorted, then level by level from the
+        largest intersection and by the ranks of its sets, as the intersections are decoded
+        Args:
+            key (tuple): the intersection
 
-        # sort the intersection set
-        if intersection_sort:
-            self.intersection_order = sorted(self.intersections, key=lambda x: len(self.intersections[x]),
-                                             reverse=intersection_sort_reverse)
-        else:
-            self.intersection_order = list(self.intersections.keys())
+        Returns:
+            tuple: the sort key, ending with the intersection
+        """
+        ranks = tuple(self.set_ranks[s] for s in key)
+        if not self.decode_options["intersection_sort"]:
+            return -len(key), ranks, key
+        size = self.intersection_size[key]
+        return -size if self.decode_options["intersection_sort_reverse"] else size, -len(key), ranks, key
+
+    @property
+    def intersection_matrix(self) -> np.ndarray | None:
+        """
+        the intersection matrix of the sorted sets and intersections, see cal_intersection_matrix, it is created on
+        the first access after a change
+        """
+        if self._intersection_matrix is None and self.intersection_order is not None:
+            self._intersection_matrix = self.cal_intersection_matrix(self.set_size_sorted, self.intersection_order)
+        return self._intersection_matrix
 
-        # create the intersection matrix
-        self.intersection_matrix = np.zeros((len(self.set_size_sorted), self.intersection_count))
-        for i, s in enumerate(self.set_size_sorted):
-            for j, inter in enumerate(self.intersection_order):
-                if s in inter:
-                    self.intersection_matrix[i, j] = self.set_size_sorted_index[s]
+    @staticmethod
+    def cal_intersection_matrix(sets: list, intersections: list[tuple]) -> np.ndarray:
+        """
+        calculate the intersection matrix by scattering the set indices of the intersections into it
+        Args:
+            sets (list): the sets in the order of the rows
+            intersections (list): the intersections in the order of the columns
 
-    def plot(self, data: dict[str: set],
+        Returns:
+            np.ndarray: the (sets x intersections) matrix, the entry of a set in an intersection is its row index
+                counted from the bottom (len(sets) - row), otherwise 0
+        """
+        n = len(sets)
+        dtype = np.uint16 if n < 2 ** 16 else np.uint32
+        matrix = np.zeros((n, len(intersections)), dtype=dtype)
+        if not n or not intersections:
+            return matrix
+
+        # the row of every member set and the column of its intersection
+        index = {s: i for i, s in enumerate(sets)}
+        degrees = np.fromiter(map(len, intersections), dtype=np.intp, count=len(intersections))
+        rows = np.fromiter((index[s] for inter in intersections for s in inter), dtype=np.intp, count=degrees.sum())
+        columns = np.repeat(np.arange(len(intersections)), degrees)
+        matrix[rows, columns] = n - rows
+        return matrix
+
+    def plot(self, data: dict[str: set] | None = None,
              figure_size: tuple[float, float] = (10, 6),
              figure_dpi: float = 100,
              intersection_sort: bool = True,
@@ -92,11 +329,18 @@ class Upset:
              ignore_empty_set: bool = True,
              save_path: str | None = None,
              intersection_label: str = "Intersection Size",
-             set_size_label: str = "Set Size") -> None:
+             set_size_label: str = "Set Size",
+             backend: str = "python",
+             cache: bool = True,
+             top_k: int | None = None,
+             min_size: int | None = None,
+             max_degree: int | None = None,
+             show: bool = True) -> Figure:
         """
         Plot the upset plot
         Args:
-            data (dict): the data to generate venn data
+            data (dict | None): the data to generate venn data, if None the data decoded before (and updated by
+                add_set / remove_set) is plotted and the sort arguments are ignored
             figure_size (tuple): the size of the figure
             figure_dpi (float): the dpi of the figure
             intersection_sort (bool): if sort the intersection set according to the size
@@ -113,15 +357,32 @@ class Upset:
             save_path (str | None): the path to save the figure
             intersection_label (str): the label of the intersection
             set_size_label (str): the label of the set size
+            backend (str): the decoding backend, "python" or "numpy"
+            cache (bool): if memoize the decoding by the content of the data
+            top_k (int | None): if only plot the top_k largest intersections
+            min_size (int | None): if only plot the intersections with at least min_size elements
+            max_degree (int | None): if only plot the intersections of at most max_degree sets
+            show (bool): if show the figure
         Returns:
+            Figure: the figure
 
         """
         # decode the data
-        self.decode_data(data, intersection_sort, intersection_sort_reverse, set_sort, set_sort_reverse, ignore_empty_set)
+        if data is not None:
+            self.decode_data(data, intersection_sort, intersection_sort_reverse, set_sort, set_sort_reverse,
+                             ignore_empty_set, keep_members=False, backend=backend, cache=cache,
+                             top_k=top_k, min_size=min_size, max_degree=max_degree)
+        elif self.data is None:
+            raise Exception("The data must be given or decoded before plotting")
 
         # calculate the width space according to the set label length
         w_space = max([len(s) for s in self.set_size_sorted]) * 0.025 + 0.05
 
+        # matplotlib is only imported by the first plot
+        from matplotlib import pyplot as plt, gridspec
+        from matplotlib.collections import LineCollection, PolyCollection
+        from matplotlib.colors import to_rgba
+
         # plot the upset plot-------------------------------------------------------------------------------------------
         spec = gridspec.GridSpec(2, 2,
                                  height_ratios=height_ratios,
@@ -132,7 +393,7 @@ class Upset:
 
         # 1. plot the set size bar chart ===============================================================================
         ax_set_size_bar = fig.add_subplot(spec[1, 0])
-        set_size_sorted_count = [len(data[k]) for k in self.set_size_sorted]
+        set_size_sorted_count = [self.set_size[k] for k in self.set_size_sorted]
         bars_h = ax_set_size_bar.barh(self.set_size_sorted[::-1], set_size_sorted_count[::-1],
                                       color=size_bar_color,
                                       height=0.7, alpha=1, align='edge')
@@ -141,7 +402,10 @@ class Upset:
         for bar, value in zip(ax_set_size_bar.patches, set_size_sorted_count[::-1]):
             bar.set_x(value - bar.get_width())
 
-        for bar in bars_h:
+        # label the bars, culled to every stride-th bar when the labels would overlap
+        stride = self.cal_label_stride(len(bars_h), figure_size[1] * height_ratios[1] / sum(height_ratios),
+                                       plt.rcParams["font.size"])
+        for bar in bars_h[::-1][::stride]:
             width = bar.get_width()  # gets the width of the column
             ax_set_size_bar.text(width * 1.02,  # x coordinates (slightly to the right of the column)
                                  bar.get_y() + bar.get_height() / 2,  # y coordinates (slightly higher than the column)
@@ -164,14 +428,22 @@ class Upset:
 
         # 2. plot the intersection bar chart ===========================================================================
         ax_intersection_bar = fig.add_subplot(spec[0, 1])
-        bars = ax_intersection_bar.bar(range(self.intersection_count),
-                                       [len(self.intersections[inter]) for inter in self.intersection_order],
-                                       color=intersection_bar_color,
-                                       width=0.7, alpha=1)
-
-        for bar in bars:
-            height = bar.get_height()  # gets the height of the post
-            ax_intersection_bar.text(bar.get_x() + bar.get_width() / 2,  # x coordinate
+
+        # all bars in one collection, the colors are cycled like in ax.bar
+        heights = np.array([self.intersection_size[inter] for inter in self.intersection_order], dtype=float)
+        x = np.arange(self.intersection_count)
+        bar_colors = [intersection_bar_color] if isinstance(intersection_bar_color, str) else list(intersection_bar_color)
+        bars = PolyCollection([[(i - 0.35, 0), (i - 0.35, h), (i + 0.35, h), (i + 0.35, 0)] for i, h in zip(x, heights)],
+                              facecolors=bar_colors, edgecolors="none")
+        ax_intersection_bar.add_collection(bars)
+        ax_intersection_bar.set_ylim(0, max(heights.max(initial=0) * 1.05, 1))
+
+        # label the bars, culled to every stride-th bar when the labels would overlap
+        label_length = len(str(max(self.intersection_size.values(), default=0))) * 0.6 * plt.rcParams["font.size"]
+        stride = self.cal_label_stride(self.intersection_count, figure_size[0] * width_ratios[1] / sum(width_ratios),
+                                       label_length)
+        for i, height in zip(x[::stride], heights[::stride]):
+            ax_intersection_bar.text(i,  # x coordinate
                                      height + 0.5,  # Y-coordinate (slightly higher than the column)
                                      f'{height:.0f}',  # displays text formatted as integers
                                      ha='center', va='bottom')  # text alignment
@@ -192,18 +464,22 @@ class Upset:
         # 3. plot the intersection matrix ==============================================================================
         ax_intersection = fig.add_subplot(spec[1, 1])
 
-        for i in range(len(self.set_size_sorted)):
-            color = [intersection_color if i != 0 else no_intersections_color for i in self.intersection_matrix[i]]
-            ax_intersection.scatter(range(self.intersection_count),
-                                    [len(self.set_size_sorted) - i for _ in range(self.intersection_count)],
-                                    color=color, s=80)
-
-        for i in range(self.intersection_matrix.shape[1]):
-            inter_sec = [i for i in self.intersection_matrix.T[i] if i != 0]
-            if len(inter_sec) != 1:
-                max_index = np.max(inter_sec)
-                min_index = np.min(inter_sec)
-                ax_intersection.plot([i, i], [min_index, max_index], color=intersection_color)
+        # all dots in one collection
+        set_count = len(self.set_size_sorted)
+        member = self.intersection_matrix != 0
+        colors = np.array([to_rgba(no_intersections_color), to_rgba(intersection_color)])
+        ax_intersection.scatter(np.tile(np.arange(self.intersection_count), set_count),
+                                np.repeat(np.arange(set_count, 0, -1), self.intersection_count),
+                                color=colors[member.ravel().astype(int)], s=80)
+
+        # all connectors in one collection, from the lowest to the highest set of every intersection
+        columns = np.flatnonzero(member.sum(axis=0) > 1)
+        if columns.size:
+            matrix = self.intersection_matrix[:, columns]
+            low = np.where(member[:, columns], matrix, matrix.max()).min(axis=0)
+            high = matrix.max(axis=0)
+            segments = np.stack([np.stack([columns, low], axis=1), np.stack([columns, high], axis=1)], axis=1)
+            ax_intersection.add_collection(LineCollection(segments.astype(float), colors=intersection_color))
 
         ax_intersection.set_yticks(range(1, len(self.set_size_sorted) + 1))
         ax_intersection.set_yticklabels(self.set_size_sorted[::-1])
@@ -215,9 +491,7 @@ class Upset:
         ax_intersection.spines["left"].set_visible(False)
 
         # add the alternate colors map to the intersection matrix
-        alternate_colors = np.zeros((len(self.set_size_sorted), self.intersection_count))
-        for i in range(len(self.set_size_sorted)):
-            alternate_colors[i, :] = 1 if i % 2 == 0 else 0
+        alternate_colors = (np.arange(set_count) % 2 == 0).astype(float)[:, None]
 
         ax_intersection.imshow(alternate_colors, cmap='binary', aspect='auto',
                                extent=(-1, self.intersection_count, 0.5, len(self.set_size_sorted) + 0.5), alpha=0.05,
@@ -228,9 +502,29 @@ class Upset:
         ax_intersection.set_xlim(-1, self.intersection_count)
 
         if save_path:
-            plt.savefig(save_path, dpi=figure_dpi)
+            fig.savefig(save_path, dpi=figure_dpi)
+
+        if show:
+            plt.show()
+
+        return fig
+
+    @staticmethod
+    def cal_label_stride(count: int, axis_length: float, label_length: float) -> int:
+        """
+        calculate the stride of the bar labels, so that the labels do not overlap
+        Args:
+            count (int): the number of bars
+            axis_length (float): the length of the axis along the bars in inches
+            label_length (float): the length of a label along the axis in points
 
-        plt.show()
+        Returns:
+            int: label every stride-th bar
+        """
+        if count == 0:
+            return 1
+        pitch = axis_length * 72 / (count + 1)
+        return max(1, math.ceil(label_length / pitch))
 
 
 if __name__ == '__main__':
@@ -5,11 +5,10 @@
 # @File     : venn
 # @Project  : MALDI_Decipher
 # @Desc     :
-from matplotlib import pyplot as plt
-from matplotlib.patches import Circle
-
-from src.venn.decode_venn_data import decode_venn_data
-from src.venn.venn_utils import cal_intersection_ll, cal_distance, cal_intersection_points_cc, split_arc, cal_centroid
+from src.venn.decode_venn_data import decode_venn_counts
+from src.venn.venn_cache import decode_cache, layout_cache
+from src.venn.venn_geometry import cal_venn_geometry, fit_geometry
+from src.venn.venn_utils import cal_intersection_ll
 
 
 class Venn:
@@ -19,18 +18,20 @@ class Venn:
     def plot(self, *args, **kwargs):
         area = kwargs.get("area", False)
         if not area:
-            self.draw(*args, **kwargs)
+            return self.draw(*args, **kwargs)
         else:
-            self.draw_area(*args, **kwargs)
+            return self.draw_area(*args, **kwargs)
 
     @staticmethod
     def draw(data: dict, alpha: float = 0.5, annotation_color: str = "black", area=False, distance: float = 1.25,
              edgecolor: str = "black", face_colors: list = None, font: str = "Arial", fontsize_annotation: int = 10,
              fontsize_label: int = 12, label_color: str = "black", linewidth: float = 1.0, max_iteration: int = 10000,
-             radius: float = 1.0, tol: float = 1e-6, up: bool = True):
+             radius: float = 1.0, tol: float = 1e-6, up: bool = True, cache: bool = True, show: bool = True):
         """
         Draw the venn area
-        :return:
+        :param cache: If True, the decoding is memoized by the content of the data
+        :param show: If True, the figure is shown
+        :return: the figure
         """
         length = len(data)
         labels = list(data.keys())
@@ -38,7 +39,10 @@ class Venn:
         if length != 2 and length != 3:
             raise Exception("The length of the data must be 2 or 3")
 
-        data = decode_venn_data(data)
+        data = decode_cache.decode_venn_counts(data) if cache else decode_venn_counts(data)
+
+        from matplotlib import pyplot as plt
+        from matplotlib.patches import Circle
 
         fig, ax = plt.subplots()
         ax.axis('off')
@@ -52,9 +56,9 @@ class Venn:
                 face_colors_1 = face_colors[0]
                 face_colors_2 = face_colors[1]
 
-            S1 = len(data[(labels[0],)])
-            S2 = len(data[(labels[1],)])
-            A12 = len(data[(labels[0], labels[1])])
+            S1 = data[(labels[0],)]
+            S2 = data[(labels[1],)]
+            A12 = data[(labels[0], labels[1])]
 
             # Calculate the distance between two circles
             r1, r2, = radius, radius
@@ -90,7 +94,8 @@ class Venn:
 
             ax.set_xlim(-1.1 * radius, (distance + r2) * 1.1)
             ax.set_ylim(-1.1 * radius, 1.1 * radius)
-            plt.show()
+            if show:
+                plt.show()
 
         elif length == 3:
             if face_colors is None or len(face_colors) != 3:
@@ -102,13 +107,13 @@ class Venn:
                 face_colors_2 = face_colors[1]
                 face_colors_3 = face_colors[2]
 
-            S1 = len(data[(labels[0],)])
-            S2 = len(data[(labels[1],)])
-            S3 = len(data[(labels[2],)])
-            A12 = len(data[(labels[0], labels[1])])
-            A13 = len(data[(labels[0], labels[2])])
-            A23 = len(data[(labels[1], labels[2])])
-            A123 = len(data[(labels[0], labels[1], labels[2])])
+            S1 = data[(labels[0],)]
+            S2 = data[(labels[1],)]
+            S3 = data[(labels[2],)]
+            A12 = data[(labels[0], labels[1])]
+            A13 = data[(labels[0], labels[2])]
+            A23 = data[(labels[1], labels[2])]
+            A123 = data[(labels[0], labels[1], labels[2])]
 
             r1 = radius
             r2 = radius
@@ -201,219 +206,104 @@ class Venn:
 
 
             plt.tight_layout()
-            plt.show()
+            if show:
+                plt.show()
+
+        return fig
 
     @staticmethod
     def draw_area(data, alpha: float = 0.5, annotation_color: str = "black", area= True, edgecolor: str = "black", face_colors: list = None,
              font: str = "Arial", fontsize_annotation: int = 10, fontsize_label: int = 12, label_color: str = "black",
-             linewidth: float = 1.0, max_iteration: int = 10000, radius: float = 1.0, tol: float = 1e-6, up: bool = True):
+             linewidth: float = 1.0, max_iteration: int = 10000, radius: float = 1.0, tol: float = 1e-6, up: bool = True,
+             cache: bool = True, show: bool = True, full_output: bool = False, time_budget: float = 0.8):
         """
-        Draw the venn area
-        :return:
+        Draw the venn area. 2 sets and 3 sets whose pairwise distances form a triangle are constructed exactly, the
+        circles of up to 6 sets are fitted by the layout engine
+        :param cache: If True, the decoding is memoized by the content of the data, and the geometry by the quantized
+                      region proportions, see LayoutCache
+        :param show: If True, the figure is shown
+        :param full_output: If True, the layout error is returned as well, see cal_layout_error, the regions are keyed
+                            by their membership masks
+        :param time_budget: The time budget of the layout engine in seconds, see layout_venn
+        :return: the figure, and the stress and the error of every region if full_output is True
         """
         length = len(data)
         labels = list(data.keys())
 
-        if length != 2 and length != 3:
-            raise Exception("The length of the data must be 2 or 3")
-
-        data = decode_venn_data(data)
-
-        fig, ax = plt.subplots()
-        ax.axis('off')
-        ax.set_aspect('equal')
-
-        if length == 2:
-            if face_colors is None or len(face_colors) != 2:
-                face_colors_1 = "#2B9DE3"
-                face_colors_2 = "#D3096A"
-            else:
-                face_colors_1 = face_colors[0]
-                face_colors_2 = face_colors[1]
-
-            S1 = len(data[(labels[0],)])
-            S2 = len(data[(labels[1],)])
-            A12 = len(data[(labels[0], labels[1])])
-
-            # Calculate the distance between two circles
-            r1, r2, distance = cal_distance(S1, S2, A12, tol=tol, max_iteration=max_iteration, normalization=True)
-
-            """
-            Draw the two circles
-            Circle((x, y), radius, color)
-            first circle center is (0, 0)
-            """
-            rr1 = r1 * radius
-            rr2 = r2 * radius
-            dr = distance * radius
-
-            ax.add_patch(
-                Circle((0, 0), rr1, facecolor=face_colors_1, alpha=alpha, edgecolor=edgecolor, linewidth=linewidth))
-            ax.add_patch(
-                Circle((dr, 0), rr2, facecolor=face_colors_2, alpha=alpha, edgecolor=edgecolor, linewidth=linewidth))
-
-            # annotation
-            # set the labels
-            y = max(rr1, rr2) * 1.1
-            ax.annotate(labels[0], xy=(0, 0), xytext=(-rr1, -y), va='center', ha='center', fontsize=fontsize_label,
-                        color=label_color)
-            ax.annotate(labels[1], xy=(0, 0), xytext=(rr2 + dr, -y), va='center', ha='center', fontsize=fontsize_label,
-                        color=label_color)
-
-            # set the text
-            ax.annotate(f"{S1}", xy=(0, 0), xytext=((-rr1 - rr2 + dr) / 2, 0), va='center', ha='center',
-                        fontsize=fontsize_annotation, color=annotation_color)
-            ax.annotate(f"{S2}", xy=(0, 0), xytext=((rr1 + rr2 + dr) / 2, 0), va='center', ha='center',
-                        fontsize=fontsize_annotation, color=annotation_color)
-            ax.annotate(f"{A12}", xy=(0, 0), xytext=((rr1 - rr2 + dr) / 2, 0), va='center', ha='center',
-                        fontsize=fontsize_annotation, color=annotation_color)
+        if length < 2 or length > 6:
+            raise Exception("The length of the data must be between 2 and 6")
 
-            for text in ax.texts:
-                text.set_fontname(font)
+        data = decode_cache.decode_venn_counts(data) if cache else decode_venn_counts(data)
+        counts = {sum(1 << labels.index(label) for label in combination): count
+                  for combination, count in data.items()}
 
-            ax.set_xlim(-1.1 * radius, (dr + rr2) * 1.1)
-            ax.set_ylim(-1.1 * radius, 1.1 * radius)
-            plt.show()
-
-        elif length == 3:
-            if face_colors is None or len(face_colors) != 3:
-                face_colors_1 = "#2B9DE3"
-                face_colors_2 = "#D3096A"
-                face_colors_3 = "#FFD700"
-            else:
-                face_colors_1 = face_colors[0]
-                face_colors_2 = face_colors[1]
-                face_colors_3 = face_colors[2]
-
-            S1 = len(data[(labels[0],)])
-            S2 = len(data[(labels[1],)])
-            S3 = len(data[(labels[2],)])
-            A12 = len(data[(labels[0], labels[1])])
-            A13 = len(data[(labels[0], labels[2])])
-            A23 = len(data[(labels[1], labels[2])])
-            A123 = len(data[(labels[0], labels[1], labels[2])])
-
-            # Calculate the distance between two circles
-            # C1 - C2
-            R11, R21, distance1_2 = cal_distance(S1 + A13, S2 + A23, A12 + A123, tol=tol, max_iteration=max_iteration,
-                                                 normalization=False)
-            # C1 - C3
-            R12, R32, distance1_3 = cal_distance(S1 + A12, S3 + A23, A13 + A123, tol=tol, max_iteration=max_iteration,
-                                                 normalization=False)
-            # C2 - C3
-            R23, R33, distance2_3 = cal_distance(S2 + A12, S3 + A13, A23 + A123, tol=tol, max_iteration=max_iteration,
-                                                 normalization=False)
-
-            if R11 == R12 and R21 == R23 and R32 == R33:
-                R1 = R11
-                R2 = R21
-                R3 = R32
-            else:
-                raise Exception("The circles are not intersected")
-
-            # normalize the radius
-            st = max(R1, R2, R3)
-            rr1 = radius * R1 / st
-            rr2 = radius * R2 / st
-            rr3 = radius * R3 / st
-            dr1_2 = radius * distance1_2 / st
-            dr1_3 = radius * distance1_3 / st
-            dr2_3 = radius * distance2_3 / st
-
-            # calculate the center of the third circle
-            x = (dr1_3 ** 2 - dr2_3 ** 2 + dr1_2 ** 2) / (2 * dr1_2)
-
-            if up:
-                y = (dr1_3 ** 2 - x ** 2) ** 0.5
-                ax.add_patch(
-                    Circle((0, 0), rr1, facecolor=face_colors_1, alpha=alpha, edgecolor=edgecolor, linewidth=linewidth))
-                ax.add_patch(
-                    Circle((dr1_2, 0), rr2, facecolor=face_colors_2, alpha=alpha, edgecolor=edgecolor, linewidth=linewidth))
-                ax.add_patch(
-                    Circle((x, y), rr3, facecolor=face_colors_3, alpha=alpha, edgecolor=edgecolor, linewidth=linewidth))
-
-                # set the labels
-                bias = max(rr1, rr2) * 1.15
-                ax.annotate(labels[0], xy=(0, 0), xytext=(-rr1, -bias), va='center', ha='center', fontsize=fontsize_label,
-                            color=label_color)
-                ax.annotate(labels[1], xy=(0, 0), xytext=(rr2 + dr1_2, -bias), va='center', ha='center', fontsize=fontsize_label,
-                            color=label_color)
-                ax.annotate(labels[2], xy=(0, 0), xytext=(x, (y + rr3) * 1.15), va='center', ha='center', fontsize=fontsize_label,
-                            color=label_color)
-
-                # calculate the text position
-                pE, pC = cal_intersection_points_cc(0, 0, rr1, dr1_2, 0, rr2)
-                pB, pD = cal_intersection_points_cc(dr1_2, 0, rr2, x, y, rr3)
-                pA, pF = cal_intersection_points_cc(0, 0, rr1, x, y, rr3)
-
-                c1 = split_arc(0, 0, rr1, pA, pC) + split_arc(dr1_2, 0, rr2, pD, pC) + split_arc(x, y, rr3, pA, pD)
-                c2 = split_arc(x, y, rr3, pF, pB) + split_arc(0, 0, rr1, pC, pF) + split_arc(dr1_2, 0, rr2, pC, pB)
-                c3 = split_arc(0, 0, rr1, pE, pA) + split_arc(dr1_2, 0, rr2, pB, pE) + split_arc(x, y, rr3, pB, pA)
-
-                c12 = split_arc(0, 0, rr1, pC, pF) + split_arc(x, y, rr3, pD, pF) + split_arc(dr1_2, 0, rr2, pD, pC)
-                c13 = split_arc(0, 0, rr1, pE, pA) + split_arc(x, y, rr3, pA, pD) + split_arc(dr1_2, 0, rr2, pE, pD)
-                c23 = split_arc(0, 0, rr1, pF, pE) + split_arc(x, y, rr3, pF, pB) + split_arc(dr1_2, 0, rr2, pB, pE)
-
-                c123 = split_arc(0, 0, rr1, pF, pE) + split_arc(dr1_2, 0, rr2, pE, pD) + split_arc(x, y, rr3, pD, pF)
+        options = {"up": up, "tol": tol, "max_iteration": max_iteration, "time_budget": time_budget}
+        if cache:
+            geometry = layout_cache.get_layout(counts, length, lambda: cal_venn_geometry(counts, length, **options),
+                                               **options)
+            # the cached geometry may belong to near-identical region sizes
+            geometry = fit_geometry(geometry, counts)
+        else:
+            geometry = cal_venn_geometry(counts, length, **options)
 
-                ax.set_xlim(-1.1 * rr1, (dr1_2 + rr2) * 1.1)
-                ax.set_ylim(-bias, (y + rr3) * 1.2)
+        fig = Venn.draw_geometry(geometry, labels, counts, alpha=alpha, annotation_color=annotation_color,
+                                 edgecolor=edgecolor, face_colors=face_colors, font=font,
+                                 fontsize_annotation=fontsize_annotation, fontsize_label=fontsize_label,
+                                 label_color=label_color, linewidth=linewidth, radius=radius, show=show)
+        if full_output:
+            return fig, (geometry["stress"], geometry["errors"])
+        return fig
 
-            else:
-                y = - (dr1_3 ** 2 - x ** 2) ** 0.5
-                ax.add_patch(
-                    Circle((0, 0), rr1, facecolor=face_colors_1, alpha=alpha, edgecolor=edgecolor, linewidth=linewidth))
-                ax.add_patch(
-                    Circle((dr1_2, 0), rr2, facecolor=face_colors_2, alpha=alpha, edgecolor=edgecolor, linewidth=linewidth))
-                ax.add_patch(
-                    Circle((x, y), rr3, facecolor=face_colors_3, alpha=alpha, edgecolor=edgecolor, linewidth=linewidth))
+    @staticmethod
+    def draw_geometry(geometry: dict, labels: list, counts: dict[int, int], alpha: float = 0.5,
+                      annotation_color: str = "black", edgecolor: str = "black", face_colors: list = None,
+                      font: str = "Arial", fontsize_annotation: int = 10, fontsize_label: int = 12,
+                      label_color: str = "black", linewidth: float = 1.0, radius: float = 1.0, show: bool = True):
+        """
+        Draw the venn area from its geometry, see cal_venn_geometry
+        :param geometry: The geometry with the largest circle of radius 1
+        :param labels: The labels of the sets
+        :param counts: The region sizes keyed by the membership masks
+        :param radius: The radius of the largest circle
+        :return: the figure
+        """
+        length = len(labels)
+        if face_colors is None or len(face_colors) != length:
+            face_colors = ["#2B9DE3", "#D3096A", "#FFD700", "#2BC48A", "#8E5CD9", "#F28C28"][:length]
 
-                # set the labels
-                bias = max(rr1, rr2) * 1.15
-                ax.annotate(labels[0], xy=(0, 0), xytext=(-rr1, bias), va='center', ha='center', fontsize=fontsize_label,
-                            color=label_color)
-                ax.annotate(labels[1], xy=(0, 0), xytext=(rr2 + dr1_2, bias), va='center', ha='center',
-                            fontsize=fontsize_label,
-                            color=label_color)
-                ax.annotate(labels[2], xy=(0, 0), xytext=(x, (y - rr3) * 1.15), va='center', ha='center', fontsize=fontsize_label,
-                            color=label_color)
+        from matplotlib import pyplot as plt
+        from matplotlib.patches import Circle
 
-                # calculate the text position
-                pA, pF = cal_intersection_points_cc(0, 0, rr1, dr1_2, 0, rr2)
-                pB, pD = cal_intersection_points_cc(dr1_2, 0, rr2, x, y, rr3)
-                pC, pE = cal_intersection_points_cc(0, 0, rr1, x, y, rr3)
+        fig, ax = plt.subplots()
+        ax.axis('off')
+        ax.set_aspect('equal')
 
-                c1 = split_arc(0, 0, rr1, pA, pC) + split_arc(dr1_2, 0, rr2, pA, pD) + split_arc(x, y, rr3, pD, pC)
-                c2 = split_arc(x, y, rr3, pB, pE) + split_arc(0, 0, rr1, pE, pA) + split_arc(dr1_2, 0, rr2, pB, pA)
-                c3 = split_arc(0, 0, rr1, pC, pF) + split_arc(dr1_2, 0, rr2, pF, pB) + split_arc(x, y, rr3, pC, pB)
+        for (x, y, r), face_color in zip(geometry["circles"], face_colors):
+            ax.add_patch(Circle((x * radius, y * radius), r * radius, facecolor=face_color, alpha=alpha,
+                                edgecolor=edgecolor, linewidth=linewidth))
 
-                c12 = split_arc(0, 0, rr1, pE, pA) + split_arc(x, y, rr3, pE, pD) + split_arc(dr1_2, 0, rr2, pA, pD)
-                c13 = split_arc(0, 0, rr1, pC, pF) + split_arc(x, y, rr3, pD, pC) + split_arc(dr1_2, 0, rr2, pD, pF)
-                c23 = split_arc(0, 0, rr1, pF, pE) + split_arc(x, y, rr3, pB, pE) + split_arc(dr1_2, 0, rr2, pF, pB)
+        # set the labels
+        for label, (x, y) in zip(labels, geometry["set_anchors"]):
+            ax.annotate(label, xy=(0, 0), xytext=(x * radius, y * radius), va='center', ha='center',
+                        fontsize=fontsize_label, color=label_color)
 
-                c123 = split_arc(0, 0, rr1, pF, pE) + split_arc(dr1_2, 0, rr2, pD, pF) + split_arc(x, y, rr3, pE, pD)
+        # set the text
+        for mask, (x, y) in geometry["region_anchors"].items():
+            ax.annotate(f"{counts.get(mask, 0)}", xy=(0, 0), xytext=(x * radius, y * radius), va='center',
+                        ha='center', fontsize=fontsize_annotation, color=annotation_color)
 
-                ax.set_xlim(-1.1 * rr1, (dr1_2 + rr2) * 1.1)
-                ax.set_ylim((y - rr3) * 1.2, bias)
+        for text in ax.texts:
+            text.set_fontname(font)
 
-            ax.annotate(f"{S1}", xy=(0, 0), xytext=(cal_centroid(c1)[1]), va='center', ha='center',
-                        fontsize=fontsize_annotation, color=annotation_color)
-            ax.annotate(f"{S2}", xy=(0, 0), xytext=(cal_centroid(c2)[1]), va='center', ha='center',
-                        fontsize=fontsize_annotation, color=annotation_color)
-            ax.annotate(f"{S3}", xy=(0, 0), xytext=(cal_centroid(c3)[1]), va='center', ha='center',
-                        fontsize=fontsize_annotation, color=annotation_color)
-            ax.annotate(f"{A12}", xy=(0, 0), xytext=(cal_centroid(c12)[1]), va='center', ha='center',
-                        fontsize=fontsize_annotation, color=annotation_color)
-            ax.annotate(f"{A13}", xy=(0, 0), xytext=(cal_centroid(c13)[1]), va='center', ha='center',
-                        fontsize=fontsize_annotation, color=annotation_color)
-            ax.annotate(f"{A23}", xy=(0, 0), xytext=(cal_centroid(c23)[1]), va='center', ha='center',
-                        fontsize=fontsize_annotation, color=annotation_color)
-            ax.annotate(f"{A123}", xy=(0, 0), xytext=(cal_centroid(c123)[1]), va='center', ha='center',
-                        fontsize=fontsize_annotation, color=annotation_color)
+        (x0, x1), (y0, y1) = geometry["limits"]
+        ax.set_xlim(x0 * radius, x1 * radius)
+        ax.set_ylim(y0 * radius, y1 * radius)
 
-            plt.tight_layout()
+        plt.tight_layout()
+        if show:
             plt.show()
 
+        return fig
 
 
 if __name__ == '__main__':
@@ -0,0 +1,256 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Author   : zhyemqww
+# @Time     : 2026/10/18 21:10
+# @File     : venn_cache
+# @Project  : Toolbox
+# @Desc     : memoization of the venn decoding
+import hashlib
+import json
+import os
+import sys
+from collections import OrderedDict, namedtuple
+from typing import Callable, Hashable, Iterator
+
+from src.venn.decode_venn_data import decode_venn_data, decode_venn_counts
+
+CacheInfo = namedtuple("CacheInfo", ["hits", "misses", "evictions", "size", "max_size", "nbytes", "max_bytes"])
+
+
+def fingerprint(data: dict) -> tuple:
+    """
+    Calculate the content fingerprint of the venn data. Every set is reduced to its size and the sum of the hashes of
+    its elements, so the fingerprint does not depend on the order of the elements and holds no copy of the sets. Sets
+    with equal fingerprints are told apart by checksum.
+    :param data: A dictionary where the keys are identifiers and the values are sets
+    :return: The fingerprint, a tuple of (identifier, size, hash sum) for every set
+    """
+    return tuple((k, len(v), sum(map(hash, v))) for k, v in as_sets(data))
+
+
+def checksum(data: dict) -> tuple:
+    """
+    Calculate the checksum of the venn data, the sum of the hashes of the element representations of every set. Unlike
+    the element hashes, the representations tell apart distinct elements of the same hash, like -1 and -2.
+    :param data: A dictionary where the keys are identifiers and the values are sets
+    :return: The checksum, a tuple of the representation hash sum of every set
+    """
+    return tuple(sum(map(hash, map(repr, v))) for _, v in as_sets(data))
+
+
+def as_sets(data: dict) -> Iterator[tuple[Hashable, set | frozenset]]:
+    """
+    Iterate the sets of the venn data, the other iterables are converted to sets to drop their duplicates
+    """
+    for k, v in data.items():
+        yield k, v if isinstance(v, (set, frozenset)) else set(v)
+
+
+def estimate_size(value: object) -> int:
+    """
+    Estimate the memory held by a decoding result, the elements themselves are shared with the input and not counted
+    :param value: A dictionary with combinations as keys and sets or sizes as values
+    :return: The estimated size in bytes
+    """
+    size = sys.getsizeof(value)
+    for k, v in value.items():
+        size += sys.getsizeof(k) + sys.getsizeof(v)
+    return size
+
+
+class DecodeCache:
+    """
+    LRU cache of the venn decoding results, keyed by the content fingerprint of the input sets and checked against
+    their checksum, so neither holds a copy of the sets. The cached results are shared between the callers and must
+    not be modified.
+    """
+
+    def __init__(self, max_size: int | None = 32, max_bytes: int | None = None):
+        """
+        :param max_size: The maximum number of cached results, None for no limit
+        :param max_bytes: The maximum estimated size of the cached results in bytes, None for no limit
+        """
+        self.max_size = max_size
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.nbytes = 0
+        self._entries = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable, compute: Callable[[], object], check: Callable[[], Hashable] | None = None) -> object:
+        """
+        Get the cached value of the key, or compute and cache it
+        :param key: The cache key
+        :param compute: The function computing the value
+        :param check: The function computing the checksum of the input, a cached value of the same key but another
+                      checksum is computed again and replaced. It is only called when the value is stored or the key
+                      is found.
+        :return: The value
+        """
+        entry = self._entries.get(key)
+        checked = None if check is None or entry is None else check()
+        if entry is not None and entry[2] == checked:
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return entry[0]
+
+        self.misses += 1
+        if entry is not None:
+            # the fingerprints collide
+            del self._entries[key]
+            self.nbytes -= entry[1]
+        value = compute()
+        nbytes = estimate_size(value)
+        if self.max_bytes is not None and nbytes > self.max_bytes:
+            return value
+
+        if checked is None and check is not None:
+            checked = check()
+        self._entries[key] = (value, nbytes, checked)
+        self.nbytes += nbytes
+        while ((self.max_size is not None and len(self._entries) > self.max_size) or
+               (self.max_bytes is not None and self.nbytes > self.max_bytes)):
+            _, (_, evicted, _) = self._entries.popitem(last=False)
+            self.nbytes -= evicted
+            self.evictions += 1
+        return value
+
+    def decode_venn_data(self, data: dict, **kwargs) -> dict[tuple: set]:
+        """
+        Cached decode_venn_data
+        :param data: A dictionary where the keys are identifiers and the values are sets
+        :param kwargs: The keyword arguments of decode_venn_data
+        :return: A dictionary with keys as combinations of identifiers and values as the intersection sets
+        """
+        key = ("data", fingerprint(data), tuple(sorted(kwargs.items())))
+        return self.get(key, lambda: decode_venn_data(data, **kwargs), check=lambda: checksum(data))
+
+    def decode_venn_counts(self, data: dict, **kwargs) -> dict[tuple: int]:
+        """
+        Cached decode_venn_counts
+        :param data: A dictionary where the keys are identifiers and the values are sets
+        :param kwargs: The keyword arguments of decode_venn_counts
+        :return: A dictionary with keys as combinations of identifiers and values as the intersection sizes
+        """
+        key = ("counts", fingerprint(data), tuple(sorted(kwargs.items())))
+        return self.get(key, lambda: decode_venn_counts(data, **kwargs), check=lambda: checksum(data))
+
+    def cache_info(self) -> CacheInfo:
+        """
+        The statistics of the cache
+        :return: hits, misses, evictions, size, max_size, nbytes and max_bytes of the cache
+        """
+        return CacheInfo(self.hits, self.misses, self.evictions, len(self._entries), self.max_size, self.nbytes,
+                         self.max_bytes)
+
+    def clear(self) -> None:
+        """
+        Remove all cached values and reset the statistics
+        """
+        self._entries.clear()
+        self.hits = self.misses = self.evictions = self.nbytes = 0
+
+
+def quantize_counts(counts: dict[int, float], resolution: float = 1e-3) -> tuple:
+    """
+    Normalize the region sizes to proportions of the total and round them to a resolution, so that region sizes
+    differing only slightly share the same key
+    :param counts: A dictionary with membership masks as keys and the region sizes as values
+    :param resolution: The step of the rounded proportions
+    :return: A tuple of (membership mask, rounded proportion) of the regions with a non-zero rounded proportion
+    """
+    total = sum(counts.values())
+    if not total:
+        return ()
+    steps = round(1 / resolution)
+    quantized = ((mask, round(count / total * steps)) for mask, count in sorted(counts.items()))
+    return tuple((mask, step) for mask, step in quantized if step)
+
+
+class LayoutCache(DecodeCache):
+    """
+    LRU cache of the venn geometries, keyed by the quantized region proportions and the layout options, so that
+    repeated or near-identical diagrams skip the geometry. The geometries are dictionaries of lists and numbers, with
+    a directory they are also stored as json files and survive the process.
+    """
+
+    def __init__(self, max_size: int | None = 128, max_bytes: int | None = None, path: str | os.PathLike | None = None,
+                 resolution: float = 1e-3):
+        """
+        :param max_size: The maximum number of geometries kept in memory, None for no limit
+        :param max_bytes: The maximum estimated size of the geometries kept in memory in bytes, None for no limit
+        :param path: The directory of the stored geometries, None to keep them in memory only
+        :param resolution: The step of the quantized region proportions
+        """
+        super().__init__(max_size=max_size, max_bytes=max_bytes)
+        self.path = path
+        self.resolution = resolution
+
+    def get_layout(self, counts: dict[int, float], n_sets: int, compute: Callable[[], dict], **options) -> dict:
+        """
+        Get the cached geometry of the region sizes, or compute and cache it. The key holds the non-empty regions as
+        well, so an empty region and a tiny one do not share a geometry. A cached geometry may come from near-identical
+        region sizes, see fit_geometry.
+        :param counts: A dictionary with membership masks as keys and the region sizes as values
+        :param n_sets: The number of sets
+        :param compute: The function computing the geometry
+        :param options: The options the geometry depends on
+        :return: The geometry
+        """
+        key = ("layout", n_sets, quantize_counts(counts, self.resolution),
+               tuple(sorted(mask for mask, count in counts.items() if count)), tuple(sorted(options.items())))
+        return self.get(key, lambda: self.load(key, compute))
+
+    def load(self, key: tuple, compute: Callable[[], dict]) -> dict:
+        """
+        Load the geometry of the key from the directory, or compute and store it
+        """
+        if self.path is None:
+            return compute()
+
+        file = os.path.join(self.path, hashlib.sha1(repr(key).encode()).hexdigest() + ".json")
+        if os.path.exists(file):
+            with open(file, encoding="utf-8") as f:
+                return from_json(json.load(f))
+
+        geometry = compute()
+        os.makedirs(self.path, exist_ok=True)
+        # write to a temporary file first, so that concurrent processes never read a partial file
+        temporary = f"{file}.{os.getpid()}.tmp"
+        with open(temporary, "w", encoding="utf-8") as f:
+            json.dump(to_json(geometry), f)
+        os.replace(temporary, file)
+        return geometry
+
+
+def to_json(value: object) -> object:
+    """
+    Convert a geometry to json, the integer keys of the dictionaries are kept as strings
+    """
+    if isinstance(value, dict):
+        return {str(k): to_json(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [to_json(v) for v in value]
+    return value
+
+
+def from_json(value: object) -> object:
+    """
+    Convert a geometry from json, the digit keys of the dictionaries are restored to integers and the lists of numbers
+    to tuples
+    """
+    if isinstance(value, dict):
+        return {int(k) if k.isdigit() else k: from_json(v) for k, v in value.items()}
+    if isinstance(value, list):
+        items = [from_json(v) for v in value]
+        return tuple(items) if all(isinstance(v, (int, float)) for v in items) else items
+    return value
+
+
+# the caches shared by the plotters, the decoding results are bounded by their size as well
+decode_cache = DecodeCache(max_bytes=256 * 2 ** 20)
+layout_cache = LayoutCache()
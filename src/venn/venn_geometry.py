@@ -0,0 +1,226 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Author   : zhyemqww
+# @Time     : 2026/10/19 05:30
+# @File     : venn_geometry
+# @Project  : Toolbox
+# @Desc     : geometry of the venn area without any plotting backend
+import math
+from collections import namedtuple
+
+import numpy as np
+
+from src.venn.venn_layout import layout_venn
+from src.venn.venn_utils import cal_arcs, cal_distance, cal_distance_batch, cal_region_moments, cal_layout_error, \
+    get_unit_samples
+
+RegionGeometry = namedtuple("RegionGeometry", ["polygons", "area", "centroid", "anchor"])
+
+
+def cal_region_geometry(circles: list[tuple[float, float, float]], n_points: int = 64,
+                        n_samples: int = 4096) -> dict[int, RegionGeometry]:
+    """
+    Calculate the boundary, the area, the centroid and the label anchor of every region of overlapping circles
+    :param circles: (x, y, r) of the circles
+    :param n_points: The number of boundary points of a full circle, the arcs get a share by their sweep
+    :param n_samples: The number of sample points searched for the label anchors, see cal_label_anchors
+    :return: A dictionary with membership masks as keys, bit i is the i-th circle, and RegionGeometry(polygons, area,
+             centroid, anchor) of the non-empty regions as values, the polygons are the closed (N, 2) rings of the
+             boundary, counterclockwise around the region and clockwise around its holes
+    """
+    moments = cal_region_moments(circles)
+    polygons = cal_region_polygons(circles, n_points=n_points)
+    anchors = cal_label_anchors(circles, moments, n_samples=n_samples)
+    return {mask: RegionGeometry(polygons.get(mask, []), area, np.array(centroid), np.array(anchors[mask]))
+            for mask, (area, centroid) in moments.items()}
+
+
+def cal_region_polygons(circles: list[tuple[float, float, float]], n_points: int = 64) -> dict[int, list[np.ndarray]]:
+    """
+    Sample the boundary of every region of overlapping circles. The arcs of cal_arcs are traversed counterclockwise
+    by the region inside their circle and clockwise by the region outside, and the arcs of a region are chained into
+    rings by matching their end points.
+    :param circles: (x, y, r) of the circles
+    :param n_points: The number of boundary points of a full circle, the arcs get a share by their sweep
+    :return: A dictionary with membership masks as keys and the closed (N, 2) rings of the regions as values
+    """
+    pieces = {}
+    for k, starts, ends, masks in cal_arcs(circles):
+        x0, y0, r = circles[k]
+        for start, end, mask in zip(starts.tolist(), ends.tolist(), masks.tolist()):
+            theta = np.linspace(start, end, max(2, math.ceil(n_points * (end - start) / (2 * math.pi))) + 1)
+            points = np.column_stack((x0 + r * np.cos(theta), y0 + r * np.sin(theta)))
+            pieces.setdefault(mask | 1 << k, []).append(points)
+            if mask:
+                pieces.setdefault(mask, []).append(points[::-1])
+
+    scale = max(r for _, _, r in circles)
+    polygons = {}
+    for mask, arcs in pieces.items():
+        rings = []
+        while arcs:
+            ring = [arcs.pop(0)]
+            # the arc starting nearest to the end of the ring follows, until the ring is closed
+            while arcs and np.hypot(*(ring[-1][-1] - ring[0][0])) > 1e-9 * scale:
+                gaps = [np.hypot(*(arc[0] - ring[-1][-1])) for arc in arcs]
+                ring.append(arcs.pop(int(np.argmin(gaps))))
+            rings.append(np.concatenate([arc[:-1] for arc in ring]))
+        polygons[mask] = rings
+    return polygons
+
+
+def cal_label_anchors(circles: list[tuple[float, float, float]], moments: dict[int, tuple],
+                      n_samples: int = 4096) -> dict[int, tuple[float, float]]:
+    """
+    Find a label position inside every region. The centroid of a region is used unless it lies outside the region or
+    much closer to the boundary than the deepest sample point of the region, e.g. in a crescent, which is used then.
+    The depth of a point is its distance to the nearest circle.
+    :param circles: (x, y, r) of the circles
+    :param moments: The areas and the centroids of the regions, see cal_region_moments
+    :param n_samples: The number of halton sample points over the bounding box of the circles
+    :return: A dictionary with membership masks as keys and the label positions as values
+    """
+    array = np.asarray(circles, dtype=float).reshape(-1, 3)
+    low = (array[:, :2] - array[:, 2:]).min(axis=0)
+    high = (array[:, :2] + array[:, 2:]).max(axis=0)
+    masks = list(moments)
+    centroids = np.array([moments[mask][1] for mask in masks], dtype=float).reshape(-1, 2)
+    points = np.concatenate([centroids, low + get_unit_samples(n_samples) * (high - low)])
+
+    # the membership mask and the depth of every point
+    distances = np.hypot(points[:, None, 0] - array[None, :, 0], points[:, None, 1] - array[None, :, 1])
+    codes = (distances < array[:, 2]) @ (1 << np.arange(len(array)))
+    depths = np.abs(distances - array[:, 2]).min(axis=1)
+
+    anchors = {}
+    for i, mask in enumerate(masks):
+        candidates = np.flatnonzero(codes[len(masks):] == mask) + len(masks)
+        deepest = candidates[np.argmax(depths[candidates])] if candidates.size else i
+        inside = codes[i] == mask and depths[i] >= depths[deepest] / 2
+        anchors[mask] = tuple(points[i if inside else deepest].tolist())
+    return anchors
+
+
+def cal_venn_geometry(counts: dict[int, int], length: int, up: bool = True, tol: float = 1e-6,
+                      max_iteration: int = 10000, time_budget: float = 0.8) -> dict:
+    """
+    Calculate the geometry of the venn area with the largest circle of radius 1. 2 sets and 3 sets whose pairwise
+    distances form a triangle are constructed exactly, the circles of up to 6 sets are fitted by the layout engine
+    :param counts: The region sizes keyed by the membership masks
+    :param length: The number of sets
+    :param up: If True, the third circle is above the first two
+    :param tol: The tolerance of the circle distances
+    :param max_iteration: The maximum number of iterations of the circle distances
+    :param time_budget: The time budget of the layout engine in seconds
+    :return: A dictionary with the circles as (x, y, r), the set label positions, the region label positions keyed
+             by the membership masks, the axis limits, and the stress and the errors of the layout
+    """
+    if length == 2:
+        S1, S2, A12 = counts.get(1, 0), counts.get(2, 0), counts.get(3, 0)
+
+        # Calculate the distance between two circles, the first circle center is (0, 0)
+        r1, r2, distance = cal_distance(S1, S2, A12, tol=tol, max_iteration=max_iteration, normalization=True)
+        circles = [(0.0, 0.0, r1), (distance, 0.0, r2)]
+
+        y = max(r1, r2) * 1.1
+        set_anchors = [(-r1, -y), (r2 + distance, -y)]
+        region_anchors = {1: ((-r1 - r2 + distance) / 2, 0.0), 2: ((r1 + r2 + distance) / 2, 0.0),
+                          3: ((r1 - r2 + distance) / 2, 0.0)}
+        limits = ((-1.1, (distance + r2) * 1.1), (-1.1, 1.1))
+        return assemble_geometry(circles, set_anchors, region_anchors, limits, counts)
+
+    if length == 3:
+        S1, S2, S3 = counts.get(1, 0), counts.get(2, 0), counts.get(4, 0)
+        A12, A13, A23, A123 = counts.get(3, 0), counts.get(5, 0), counts.get(6, 0), counts.get(7, 0)
+
+        # Calculate the distance between two circles, C1 - C2, C1 - C3 and C2 - C3 in one batch
+        (R1, _, R2), (_, R3, _), (distance1_2, distance1_3, distance2_3) = (
+            array.tolist() for array in cal_distance_batch([S1 + A13, S1 + A12, S2 + A12],
+                                                           [S2 + A23, S3 + A23, S3 + A13],
+                                                           [A12 + A123, A13 + A123, A23 + A123],
+                                                           tol=tol, max_iteration=max_iteration,
+                                                           normalization=False))
+
+        # normalize the radius
+        st = max(R1, R2, R3)
+        rr1, rr2, rr3 = R1 / st, R2 / st, R3 / st
+        dr1_2, dr1_3, dr2_3 = distance1_2 / st, distance1_3 / st, distance2_3 / st
+
+        # calculate the center of the third circle
+        x = (dr1_3 ** 2 - dr2_3 ** 2 + dr1_2 ** 2) / (2 * dr1_2) if dr1_2 else 0.0
+
+        # if the pairwise distances do not form a triangle, the circles are fitted by the layout engine
+        if dr1_2 and dr1_3 ** 2 >= x ** 2:
+            bias = max(rr1, rr2) * 1.15
+            if up:
+                y = (dr1_3 ** 2 - x ** 2) ** 0.5
+                set_anchors = [(-rr1, -bias), (rr2 + dr1_2, -bias), (x, (y + rr3) * 1.15)]
+                limits = ((-1.1 * rr1, (dr1_2 + rr2) * 1.1), (-bias, (y + rr3) * 1.2))
+            else:
+                y = - (dr1_3 ** 2 - x ** 2) ** 0.5
+                set_anchors = [(-rr1, bias), (rr2 + dr1_2, bias), (x, (y - rr3) * 1.15)]
+                limits = ((-1.1 * rr1, (dr1_2 + rr2) * 1.1), ((y - rr3) * 1.2, bias))
+            circles = [(0.0, 0.0, rr1), (dr1_2, 0.0, rr2), (x, y, rr3)]
+
+            regions = cal_region_moments(circles)
+            region_anchors = cal_region_anchors(circles, regions, range(1, 8))
+            return assemble_geometry(circles, set_anchors, region_anchors, limits, counts, regions)
+
+    layout = layout_venn(counts, length, time_budget=time_budget)
+    circles = [(x, y, r) for x, y, r in (layout.circles / layout.circles[:, 2].max()).tolist()]
+
+    # the set labels outside the circles, away from the center of the diagram
+    set_anchors = []
+    for x, y, r in circles:
+        angle = math.atan2(y, x) if math.hypot(x, y) > 1e-9 else math.pi / 2
+        set_anchors.append((x + 1.15 * r * math.cos(angle), y + 1.15 * r * math.sin(angle)))
+
+    # only the non-empty regions are labelled
+    regions = cal_region_moments(circles)
+    region_anchors = cal_region_anchors(circles, regions, [mask for mask, count in counts.items() if count])
+    limits = ((min(x - r for x, _, r in circles) - 0.3, max(x + r for x, _, r in circles) + 0.3),
+              (min(y - r for _, y, r in circles) - 0.3, max(y + r for _, y, r in circles) + 0.3))
+    return {"circles": circles, "set_anchors": set_anchors, "region_anchors": region_anchors, "limits": limits,
+            "stress": layout.stress, "errors": layout.errors}
+
+
+def fit_geometry(geometry: dict, counts: dict[int, int]) -> dict:
+    """
+    Fit a geometry calculated for near-identical region sizes, e.g. by LayoutCache, to the region sizes: the layout
+    error is recalculated and every non-empty region without a label position gets one
+    :param geometry: The geometry, see cal_venn_geometry
+    :param counts: The region sizes keyed by the membership masks
+    :return: A new geometry with the circles of the given one
+    """
+    circles = [tuple(circle) for circle in geometry["circles"]]
+    regions = cal_region_moments(circles)
+    region_anchors = dict(geometry["region_anchors"])
+    missing = [mask for mask, count in counts.items() if count and mask not in region_anchors]
+    if missing:
+        region_anchors.update(cal_region_anchors(circles, regions, missing))
+    stress, errors = cal_layout_error({mask: v[0] for mask, v in regions.items()}, counts)
+    return {**geometry, "region_anchors": region_anchors, "stress": stress, "errors": errors}
+
+
+def cal_region_anchors(circles: list, regions: dict, masks) -> dict[int, tuple[float, float]]:
+    """
+    The label positions of regions, see cal_label_anchors, an empty region is labelled between the centers of its
+    circles
+    """
+    anchors = cal_label_anchors(circles, regions)
+    for mask in masks:
+        if mask not in anchors:
+            centers = [circle[:2] for i, circle in enumerate(circles) if mask >> i & 1]
+            anchors[mask] = sum(x for x, _ in centers) / len(centers), sum(y for _, y in centers) / len(centers)
+    return {mask: anchors[mask] for mask in masks}
+
+
+def assemble_geometry(circles: list, set_anchors: list, region_anchors: dict, limits: tuple, counts: dict,
+                      regions: dict | None = None) -> dict:
+    """
+    Assemble the geometry of the venn area with the layout error of the circles
+    """
+    regions = cal_region_moments(circles) if regions is None else regions
+    stress, errors = cal_layout_error({mask: v[0] for mask, v in regions.items()}, counts)
+    return {"circles": circles, "set_anchors": set_anchors, "region_anchors": region_anchors, "limits": limits,
+            "stress": stress, "errors": errors}
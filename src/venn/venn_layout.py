@@ -0,0 +1,272 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Author   : zhyemqww
+# @Time     : 2026/10/19 04:10
+# @File     : venn_layout
+# @Project  : Toolbox
+# @Desc     : area proportional circle layout of 2 to 6 sets
+import time
+from collections import namedtuple
+
+import numpy as np
+
+from src.venn.venn_utils import cal_distance_batch, cal_lens_area_array, cal_kite_array, cal_region_moments, \
+    cal_region_gradients, cal_layout_error
+
+VennLayout = namedtuple("VennLayout", ["circles", "stress", "errors", "iterations", "restarts"])
+
+
+def layout_venn(counts: dict[int, float], n_sets: int, time_budget: float = 0.8, max_iteration: int = 500,
+                tol: float = 1e-10, stress_tol: float = 1e-6, seed: int = 0, n_restarts: int = 8) -> VennLayout:
+    """
+    Fit the centers of circles, whose areas are the set sizes, so that the areas of their regions are proportional to
+    the region sizes. The centers start from the classical multidimensional scaling of the pairwise distances of the
+    circles, and are refined by gradient descent on the squared errors of the pairwise intersection areas. A fixed
+    number of seeded random restarts is tried, the layout with the lowest stress of the exact region areas is kept and
+    polished by descending the stress itself, so the same input always gives the same layout. The time budget only
+    cuts the restarts and the polishing short on slow machines.
+    :param counts: A dictionary with membership masks as keys, bit i is the i-th set, and the region sizes as values
+    :param n_sets: The number of sets
+    :param time_budget: The maximum time of the restarts and the polishing in seconds, the first layout is always
+                        finished, the restarts stop at 40% of it
+    :param max_iteration: The maximum number of gradient steps of one layout and of the polishing
+    :param tol: The relative improvement of the pairwise loss below which the gradient descent stops
+    :param stress_tol: The stress below which the fitting stops
+    :param seed: The seed of the random restarts
+    :param n_restarts: The number of random restarts after the layout from the scaling
+    :return: VennLayout(circles, stress, errors, iterations, restarts), the circles are an (n_sets, 3) array of
+             (x, y, r), the stress and the errors are those of cal_layout_error
+    """
+    if not 1 < n_sets <= 6:
+        raise Exception("The layout supports 2 to 6 sets")
+    if any(mask >> n_sets or mask <= 0 for mask in counts):
+        raise Exception(f"The membership masks must be within {n_sets} sets")
+
+    masks = np.array(list(counts), dtype=np.int64)
+    sizes = np.array(list(counts.values()), dtype=float)
+    if (sizes < 0).any():
+        raise Exception("The region sizes must be positive")
+    bits = (masks[:, None] >> np.arange(n_sets)) & 1
+
+    # the set areas and the pairwise intersection areas, the circles are scaled to a total area of pi
+    totals = bits.T @ sizes
+    if not totals.all():
+        raise Exception("Every set must have at least one element")
+    scale = np.pi / sizes.sum()
+    radii = np.sqrt(totals * scale / np.pi)
+    i, j = np.triu_indices(n_sets, 1)
+    overlaps = (bits[:, i] * bits[:, j]).T @ sizes * scale
+
+    # the pairwise distances of the circles with the exact intersection areas
+    _, _, distances = cal_distance_batch(np.pi * radii[i] ** 2 - overlaps, np.pi * radii[j] ** 2 - overlaps, overlaps,
+                                         normalization=False)
+    target = np.zeros((n_sets, n_sets))
+    target[i, j] = target[j, i] = distances
+
+    counts = dict(zip(masks.tolist(), sizes.tolist()))
+    rng = np.random.default_rng(seed)
+    start = time.perf_counter()
+    best, iterations, restarts = None, 0, 0
+    for restarts in range(n_restarts + 1):
+        centers = cal_mds(target) if best is None else rng.uniform(-1, 1, (n_sets, 2)) * radii.sum() / 2
+        centers, steps = descend(centers, radii, overlaps, max_iteration, tol)
+        stress = cal_stress(centers, radii, counts)
+        iterations += steps
+        if best is None or stress < best[1]:
+            best = (centers, stress)
+
+        if best[1] <= stress_tol or time.perf_counter() - start >= 0.4 * time_budget:
+            break
+
+    centers, steps = polish(best[0], radii, counts, start + time_budget, max_iteration, stress_tol)
+    iterations += steps
+    circles = np.column_stack((centers - centers.mean(axis=0), radii))
+    stress, errors = cal_layout_error(cal_areas(circles), counts)
+    return VennLayout(circles, stress, errors, iterations, restarts)
+
+
+def cal_areas(circles: np.ndarray) -> dict[int, float]:
+    """
+    The exact region areas of circles
+    :param circles: (n, 3) array of (x, y, r)
+    :return: A dictionary with membership masks as keys and the region areas as values
+    """
+    return {mask: area for mask, (area, _) in cal_region_moments([tuple(c) for c in circles]).items()}
+
+
+def cal_stress(centers: np.ndarray, radii: np.ndarray, counts: dict[int, float]) -> float:
+    """
+    The stress of the exact region areas of circles, see cal_layout_error
+    """
+    return cal_layout_error(cal_areas(np.column_stack((centers, radii))), counts)[0]
+
+
+def cal_stress_gradient(centers: np.ndarray, radii: np.ndarray, counts: dict[int, float]) -> tuple[float, np.ndarray]:
+    """
+    The stress of the exact region areas of circles and its gradient by the centers. With the residuals
+    e = a - beta * c of the least squares fit, which are orthogonal to the counts c, the derivative of the stress
+    S = |e|^2 / |a|^2 by the region areas a is 2 * (e - S * a) / |a|^2, it is chained with the area gradients of
+    cal_region_gradients.
+    :param centers: (n, 2) array of the centers
+    :param radii: (n,) array of the radii
+    :param counts: A dictionary with membership masks as keys and the region sizes as values
+    :return: The stress and the (n, 2) gradient
+    """
+    circles = [tuple(c) for c in np.column_stack((centers, radii))]
+    areas = {mask: area for mask, (area, _) in cal_region_moments(circles).items()}
+    stress = cal_layout_error(areas, counts)[0]
+    masks = sorted(set(areas) | set(counts))
+    a = np.array([areas.get(mask, 0.0) for mask in masks])
+    c = np.array([counts.get(mask, 0.0) for mask in masks])
+    gradient = np.zeros_like(centers)
+    if not a.any() or not c.any():
+        return stress, gradient
+
+    residuals = a - (a @ c) / (c @ c) * c
+    derivatives = 2 * (residuals - stress * a) / (a @ a)
+    gradients = cal_region_gradients(circles)
+    for mask, derivative in zip(masks, derivatives):
+        if mask in gradients:
+            gradient += derivative * gradients[mask]
+    return stress, gradient
+
+
+def polish(centers: np.ndarray, radii: np.ndarray, counts: dict[int, float], deadline: float, max_iteration: int,
+           stress_tol: float) -> tuple[np.ndarray, int]:
+    """
+    Minimize the stress of the exact region areas by descending its analytic gradient, with a step that is enlarged
+    after it decreased the stress and halved and retried otherwise
+    :param centers: (n, 2) array of the initial centers
+    :param radii: (n,) array of the radii
+    :param counts: A dictionary with membership masks as keys and the region sizes as values
+    :param deadline: The perf_counter time at which the polishing stops
+    :param max_iteration: The maximum number of steps
+    :param stress_tol: The stress below which the polishing stops
+    :return: The centers and the number of steps
+    """
+    stress, gradient = cal_stress_gradient(centers, radii, counts)
+    step = 0.05 * radii.max()
+    iteration = 0
+    while iteration < max_iteration and stress > stress_tol and time.perf_counter() < deadline:
+        iteration += 1
+        norm = np.abs(gradient).max()
+        if norm == 0:
+            break
+
+        while step > 1e-9 * radii.max():
+            moved = centers - step * gradient / norm
+            moved_stress, moved_gradient = cal_stress_gradient(moved, radii, counts)
+            if moved_stress < stress:
+                centers, stress, gradient = moved, moved_stress, moved_gradient
+                step *= 1.5
+                break
+            step /= 2
+        else:
+            break
+
+    return centers, iteration
+
+
+def cal_mds(target: np.ndarray) -> np.ndarray:
+    """
+    Classical multidimensional scaling of a distance matrix to the plane
+    :param target: (n, n) array of the distances
+    :return: (n, 2) array of the points
+    """
+    n = len(target)
+    centering = np.eye(n) - 1 / n
+    gram = -centering @ (target ** 2) @ centering / 2
+    values, vectors = np.linalg.eigh(gram)
+    points = vectors[:, -2:] * np.sqrt(np.maximum(values[-2:], 0))
+    # coincident points have no gradient direction
+    if np.ptp(points, axis=0).max() < 1e-9:
+        points = np.column_stack((np.cos(2 * np.pi * np.arange(n) / n), np.sin(2 * np.pi * np.arange(n) / n)))
+    return points
+
+
+def cal_pair_loss(centers: np.ndarray, radii: np.ndarray, overlaps: np.ndarray) -> tuple[float, np.ndarray]:
+    """
+    Calculate the squared errors of the pairwise intersection areas and their gradient by the centers. Where the
+    intersection area is constant, i.e. the circles are apart or one is within the other, the loss is continued
+    linearly in the distance, so that wrongly separated or nested circles are still moved.
+    :param centers: (n, 2) array of the centers
+    :param radii: (n,) array of the radii
+    :param overlaps: the target intersection areas of the pairs of np.triu_indices(n, 1)
+    :return: The loss and the (n, 2) gradient
+    """
+    i, j = np.triu_indices(len(radii), 1)
+    delta = centers[i] - centers[j]
+    d = np.maximum(np.hypot(delta[:, 0], delta[:, 1]), 1e-12)
+    r1, r2 = radii[i], radii[j]
+    small = np.minimum(r1, r2)
+
+    residual = cal_lens_area_array(r1, r2, d) - overlaps
+    slope = 2 * residual * -cal_kite_array(r1, r2, d) / d
+    loss = residual ** 2
+
+    # apart circles which must overlap are pulled together
+    apart = (d >= r1 + r2) & (overlaps > 0)
+    loss[apart] += 2 * overlaps[apart] * small[apart] * (d[apart] - r1[apart] - r2[apart])
+    slope[apart] = 2 * overlaps[apart] * small[apart]
+    # nested circles which must not be nested are pushed apart
+    nested = (d <= np.abs(r1 - r2)) & (residual > 0)
+    loss[nested] += 2 * residual[nested] * small[nested] * (np.abs(r1 - r2)[nested] - d[nested])
+    slope[nested] = -2 * residual[nested] * small[nested]
+
+    gradient = np.zeros_like(centers)
+    pair = (slope / d)[:, None] * delta
+    np.add.at(gradient, i, pair)
+    np.add.at(gradient, j, -pair)
+    return float(loss.sum()), gradient
+
+
+def descend(centers: np.ndarray, radii: np.ndarray, overlaps: np.ndarray, max_iteration: int,
+            tol: float) -> tuple[np.ndarray, int]:
+    """
+    Minimize the pairwise loss by gradient descent with an adaptive step, a step is enlarged after it decreased the
+    loss and halved and retried otherwise
+    :param centers: (n, 2) array of the initial centers
+    :param radii: (n,) array of the radii
+    :param overlaps: the target intersection areas of the pairs of np.triu_indices(n, 1)
+    :param max_iteration: The maximum number of steps
+    :param tol: The relative improvement of the loss below which the descent stops
+    :return: The centers and the number of steps
+    """
+    loss, gradient = cal_pair_loss(centers, radii, overlaps)
+    step = 0.1 * radii.max() / max(np.abs(gradient).max(), 1e-12)
+    iteration = 0
+    while iteration < max_iteration and loss > 0:
+        iteration += 1
+        moved = centers - step * gradient
+        new_loss, new_gradient = cal_pair_loss(moved, radii, overlaps)
+        if new_loss >= loss:
+            step /= 2
+            if step * np.abs(gradient).max() < 1e-12 * radii.max():
+                break
+            continue
+
+        improvement = (loss - new_loss) / loss
+        centers, loss, gradient = moved, new_loss, new_gradient
+        step *= 1.5
+        if improvement < tol:
+            break
+
+    return centers, iteration
+
+
+if __name__ == '__main__':
+    import random
+
+    from src.venn.decode_venn_data import cal_membership
+
+    rng_ = random.Random(0)
+    for n in range(2, 7):
+        da = {f"s{k}": {rng_.randint(0, 2000) for _ in range(rng_.randint(300, 800))} for k in range(n)}
+        region_counts = {}
+        for m in cal_membership(da).values():
+            region_counts[m] = region_counts.get(m, 0) + 1
+
+        t = time.perf_counter()
+        layout = layout_venn(region_counts, n)
+        print(f"{n} sets: {time.perf_counter() - t:.3f}s, stress {layout.stress:.4f}, "
+              f"{layout.iterations} steps, {layout.restarts} restarts")
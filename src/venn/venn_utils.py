@@ -7,19 +7,77 @@
 # @Desc     :
 
 import math
+from collections import namedtuple
 
+import numpy as np
 
-def cal_distance(s1: float, s2: float, a: float, tol: float = 1e-6, max_iteration: int = 10000,
-                 normalization: bool = True) -> tuple[float, float, float]:
+SolverInfo = namedtuple("SolverInfo", ["converged", "iterations", "residual"])
+
+# the unit square samples of estimate_region_areas, keyed by (method, n_points)
+_samples = {}
+
+
+def cal_lens_area(r1: float, r2: float, d: float) -> float:
+    """
+    Calculate the intersection area of two circles
+    A = r1^2 * arccos((d^2 + r1^2 - r2^2) / (2 * d * r1)) +
+        r2^2 * arccos((d^2 + r2^2 - r1^2) / (2 * d * r2)) -
+        1/2 * sqrt((-d + r1 + r2) * (d + r1 - r2) * (d - r1 + r2) * (d + r1 + r2))
+    :param r1: radius of the first circle
+    :param r2: radius of the second circle
+    :param d: distance between the centers
+    :return: intersection area
+    """
+    if d >= r1 + r2:
+        return 0.0
+    if d <= abs(r1 - r2):
+        return math.pi * min(r1, r2) ** 2
+
+    # the arguments of arccos may leave [-1, 1] by rounding, r1^2 - r2^2 is factored so that a small d is not lost
+    # against large radii
+    c1 = min(1.0, max(-1.0, (d ** 2 + (r1 - r2) * (r1 + r2)) / (2 * d * r1)))
+    c2 = min(1.0, max(-1.0, (d ** 2 - (r1 - r2) * (r1 + r2)) / (2 * d * r2)))
+    return r1 ** 2 * math.acos(c1) + r2 ** 2 * math.acos(c2) - 1 / 2 * cal_kite(r1, r2, d)
+
+
+def cal_lens_area_derivative(r1: float, r2: float, d: float) -> float:
+    """
+    Calculate the derivative of the intersection area of two circles by the distance, the negative chord length
+    dA/dd = -sqrt((-d + r1 + r2) * (d + r1 - r2) * (d - r1 + r2) * (d + r1 + r2)) / d
+    :param r1: radius of the first circle
+    :param r2: radius of the second circle
+    :param d: distance between the centers
+    :return: derivative of the intersection area
     """
-    Calculate the distance between two circles
-    :param normalization:
-    :param s1:
-    :param s2:
-    :param a:
-    :param tol:
-    :param max_iteration:
-    :return: r1, r2, distance
+    if d >= r1 + r2 or d <= abs(r1 - r2):
+        return 0.0
+    return -cal_kite(r1, r2, d) / d
+
+
+def cal_kite(r1: float, r2: float, d: float) -> float:
+    """
+    sqrt((-d + r1 + r2) * (d + r1 - r2) * (d - r1 + r2) * (d + r1 + r2)), four times the area of the triangle of the
+    two centers and an intersection point
+    """
+    return math.sqrt(max(0.0, (-d + r1 + r2) * (d + r1 - r2) * (d - r1 + r2) * (d + r1 + r2)))
+
+
+def cal_distance(s1: float, s2: float, a: float, tol: float = 1e-12, max_iteration: int = 100,
+                 normalization: bool = True, full_output: bool = False) -> tuple:
+    """
+    Calculate the distance between two circles, so that their intersection area is a. The distance is solved by a
+    newton iteration with the analytic derivative of the lens area, safeguarded by bisection of the bracket
+    [|r1 - r2|, r1 + r2] in which the area decreases monotonically. A step bisects the bracket if the newton step
+    leaves it or is not smaller than half the step before the last one, so the steps at least halve every two
+    iterations.
+    :param s1: exclusive area of the first circle
+    :param s2: exclusive area of the second circle
+    :param a: intersection area
+    :param tol: tolerance of the intersection area relative to the squared radius of the smaller circle
+    :param max_iteration: maximum number of iterations
+    :param normalization: If True, the radius of the larger circle is scaled to 1
+    :param full_output: If True, the convergence information is returned as well
+    :return: r1, r2, distance, and a SolverInfo(converged, iterations, residual) if full_output is True
     """
     # check the input
     s1 = s1 + a
@@ -27,61 +85,174 @@ def cal_distance(s1: float, s2: float, a: float, tol: float = 1e-6, max_iteratio
 
     if s1 < 0 or s2 < 0 or a < 0:
         raise Exception("The area must be positive")
+    if a > min(s1, s2):
+        raise Exception("The intersection area is larger than the smallest circle")
+    contained = a == min(s1, s2)
 
     # calculate the radius of the two circles and normalization
-    if normalization:
-        R1 = math.sqrt(s1 / math.pi)
-        R2 = math.sqrt(s2 / math.pi)
-
-        r1 = R1 / max(R1, R2)
-        r2 = R2 / max(R1, R2)
-        a = a / max(R1, R2) ** 2
+    r1 = math.sqrt(s1 / math.pi)
+    r2 = math.sqrt(s2 / math.pi)
+    # two empty circles are not scaled, like in cal_distance_batch
+    if normalization and max(r1, r2) > 0:
+        scale = max(r1, r2)
+        r1 = r1 / scale
+        r2 = r2 / scale
+        a = a / scale ** 2
+
+    # if a is zero, the circles touch, if a is the smaller circle, it is within the other one
+    if a == 0 or contained:
+        distance = r1 + r2 if a == 0 else abs(r1 - r2)
+        return (r1, r2, distance, SolverInfo(True, 0, 0.0)) if full_output else (r1, r2, distance)
+
+    lo, hi = abs(r1 - r2), r1 + r2
+    tol = tol * min(r1, r2) ** 2
+    # start from the distance at which the overlap fraction of the smaller circle is linear in the distance
+    distance = hi - (hi - lo) * a / (math.pi * min(r1, r2) ** 2)
+    residual = cal_lens_area(r1, r2, distance) - a
+    converged = False
+    # the sizes of the last step and of the step before
+    last = previous = hi - lo
+    iteration = 0
+    while iteration < max_iteration:
+        if abs(residual) <= tol or hi - lo <= 4 * math.ulp(hi):
+            converged = True
+            break
+        iteration += 1
+
+        # the area decreases with the distance
+        if residual > 0:
+            lo = distance
+        else:
+            hi = distance
+
+        derivative = cal_lens_area_derivative(r1, r2, distance)
+        step = distance - residual / derivative if derivative else math.nan
+        if not (lo < step < hi and 2 * abs(step - distance) <= previous):
+            step = (lo + hi) / 2
+        previous, last = last, abs(step - distance)
+        distance = step
+        residual = cal_lens_area(r1, r2, distance) - a
     else:
-        r1 = math.sqrt(s1 / math.pi)
-        r2 = math.sqrt(s2 / math.pi)
+        converged = abs(residual) <= tol or hi - lo <= 4 * math.ulp(hi)
 
-    # if a is zero, return the sum of the radius
-    if a == 0:
-        return r1, r2, r1 + r2
-    if a > min(s1, s2):
+    if full_output:
+        return r1, r2, distance, SolverInfo(converged, iteration, abs(residual))
+    return r1, r2, distance
+
+
+def cal_lens_area_array(r1: np.ndarray, r2: np.ndarray, d: np.ndarray) -> np.ndarray:
+    """
+    Calculate the intersection areas of pairs of circles, see cal_lens_area
+    :param r1: radii of the first circles
+    :param r2: radii of the second circles
+    :param d: distances between the centers
+    :return: intersection areas
+    """
+    r1, r2, d = np.broadcast_arrays(np.asarray(r1, dtype=float), np.asarray(r2, dtype=float),
+                                    np.asarray(d, dtype=float))
+    area = np.where(d <= np.abs(r1 - r2), np.pi * np.minimum(r1, r2) ** 2, 0.0)
+    lens = (d < r1 + r2) & (d > np.abs(r1 - r2))
+    r1, r2, d = r1[lens], r2[lens], d[lens]
+    c1 = np.clip((d ** 2 + (r1 - r2) * (r1 + r2)) / (2 * d * r1), -1, 1)
+    c2 = np.clip((d ** 2 - (r1 - r2) * (r1 + r2)) / (2 * d * r2), -1, 1)
+    area[lens] = r1 ** 2 * np.arccos(c1) + r2 ** 2 * np.arccos(c2) - 1 / 2 * cal_kite_array(r1, r2, d)
+    return area
+
+
+def cal_kite_array(r1: np.ndarray, r2: np.ndarray, d: np.ndarray) -> np.ndarray:
+    """
+    Vectorized cal_kite
+    """
+    return np.sqrt(np.maximum(0.0, (-d + r1 + r2) * (d + r1 - r2) * (d - r1 + r2) * (d + r1 + r2)))
+
+
+def cal_distance_batch(s1: np.ndarray, s2: np.ndarray, a: np.ndarray, tol: float = 1e-12, max_iteration: int = 100,
+                       normalization: bool = True, full_output: bool = False,
+                       initial: np.ndarray | None = None) -> tuple:
+    """
+    Calculate the distances between many pairs of circles at once, see cal_distance. All pairs are iterated together
+    and a pair stops once it has converged.
+    :param s1: exclusive areas of the first circles
+    :param s2: exclusive areas of the second circles
+    :param a: intersection areas
+    :param tol: tolerance of the intersection areas relative to the squared radii of the smaller circles
+    :param max_iteration: maximum number of iterations
+    :param normalization: If True, the radius of the larger circle of every pair is scaled to 1
+    :param full_output: If True, the convergence information of every pair is returned as well
+    :param initial: initial guesses of the distances, in the normalized units if normalization is True
+    :return: r1, r2, distance arrays, and a SolverInfo of arrays if full_output is True
+    """
+    s1, s2, a = np.broadcast_arrays(np.asarray(s1, dtype=float), np.asarray(s2, dtype=float),
+                                    np.asarray(a, dtype=float))
+    s1 = s1 + a
+    s2 = s2 + a
+
+    if (s1 < 0).any() or (s2 < 0).any() or (a < 0).any():
+        raise Exception("The area must be positive")
+    if (a > np.minimum(s1, s2)).any():
         raise Exception("The intersection area is larger than the smallest circle")
-    if a == min(s1, s2):
-        if s1 >= s2:
-            return r1, r2, r1 - r2
-        else:
-            return r1, r2, r2 - r1
+    contained = a == np.minimum(s1, s2)
+
+    r1 = np.sqrt(s1 / np.pi)
+    r2 = np.sqrt(s2 / np.pi)
+    if normalization:
+        scale = np.maximum(r1, r2)
+        scale = np.where(scale == 0, 1.0, scale)
+        r1 = r1 / scale
+        r2 = r2 / scale
+        a = a / scale ** 2
+
+    # the touching and the contained circles need no iteration
+    lo, hi = np.abs(r1 - r2), r1 + r2
+    distance = np.where(a == 0, hi, lo)
+    residual = np.zeros_like(distance)
+    iterations = np.zeros(distance.shape, dtype=int)
+    converged = np.ones(distance.shape, dtype=bool)
+    active = np.flatnonzero(~(contained | (a == 0)))
+
+    lo, hi, r1_, r2_, a_ = lo.flat[active], hi.flat[active], r1.flat[active], r2.flat[active], a.flat[active]
+    tol_ = tol * np.minimum(r1_, r2_) ** 2
+    # the sizes of the last step and of the step before
+    last = previous = hi - lo
+    if initial is None:
+        d = hi - (hi - lo) * a_ / (np.pi * np.minimum(r1_, r2_) ** 2)
     else:
-        # calculate the area of the intersection
-        """
-        lens area formula
-        S1 = π * r1^2
-        S2 = π * r2^2
-        The distance between the centers of the circles is d
-        A = r1^2 * arccos((d^2 + r1^2 - r2^2) / (2 * d * r1)) + 
-            r2^2 * arccos((d^2 + r2^2 - r1^2) / (2 * d * r2)) - 
-            1/2 * sqrt((-d + r1 + r2) * (d + r1 - r2) * (d - r1 + r2) * (d + r1 + r2))
-
-        """
-
-        def area(d: float) -> float:
-            return (r1 ** 2 * math.acos((d ** 2 + r1 ** 2 - r2 ** 2) / (2 * d * r1)) +
-                    r2 ** 2 * math.acos((d ** 2 + r2 ** 2 - r1 ** 2) / (2 * d * r2)) -
-                    1 / 2 * math.sqrt((-d + r1 + r2) * (d + r1 - r2) * (d - r1 + r2) * (d + r1 + r2)))
-
-        iteration = 0
-        distance = max(r1, r2)  # initial distance
-        while True:
-            iteration += 1
-            if iteration > max_iteration:
-                break
-            if abs(area(distance) - a) < tol:
+        d = np.clip(np.broadcast_to(np.asarray(initial, dtype=float), distance.shape).flat[active], lo, hi)
+    res = cal_lens_area_array(r1_, r2_, d) - a_
+    iteration = 0
+    while active.size:
+        done = (np.abs(res) <= tol_) | (hi - lo <= 4 * np.spacing(hi))
+        if iteration == max_iteration or done.any():
+            finished = done if iteration < max_iteration else np.ones_like(done)
+            distance.flat[active[finished]] = d[finished]
+            residual.flat[active[finished]] = np.abs(res[finished])
+            iterations.flat[active[finished]] = iteration
+            converged.flat[active[finished]] = done[finished]
+            keep = ~finished
+            active, lo, hi, r1_, r2_, a_, tol_, last, previous, d, res = (
+                active[keep], lo[keep], hi[keep], r1_[keep], r2_[keep], a_[keep], tol_[keep], last[keep],
+                previous[keep], d[keep], res[keep])
+            if not active.size:
                 break
-            if area(distance) > a:
-                distance = distance * 1.01
-            else:
-                distance = distance * 0.99
+        iteration += 1
+
+        # the area decreases with the distance
+        lo = np.where(res > 0, d, lo)
+        hi = np.where(res > 0, hi, d)
 
-        return r1, r2, distance
+        derivative = -cal_kite_array(r1_, r2_, d) / d
+        with np.errstate(divide="ignore", invalid="ignore"):
+            step = d - res / derivative
+        step = np.where((step > lo) & (step < hi) & (2 * np.abs(step - d) <= previous), step, (lo + hi) / 2)
+        previous, last = last, np.abs(step - d)
+        d = step
+        res = cal_lens_area_array(r1_, r2_, d) - a_
+
+    # scalar inputs give scalar outputs
+    r1, r2, distance = r1[()], r2[()], distance[()]
+    if full_output:
+        return r1, r2, distance, SolverInfo(converged[()], iterations[()], residual[()])
+    return r1, r2, distance
 
 
 def cal_intersection_points_cc(a1: float, b1: float, r1: float, a2: float, b2: float, r2: float) -> tuple[
@@ -289,6 +460,256 @@ def split_arc(x0: float, y0: float, r: float, start: tuple[float, float], end: t
     return points
 
 
+def cal_radian_array(x0: float, y0: float, points: np.ndarray) -> np.ndarray:
+    """
+    Calculate the radians of points around a center, see cal_radian
+    :param x0: x of the circle center
+    :param y0: y of the circle center
+    :param points: (N, 2) array of the points
+    :return: radians in [0, 2 * pi)
+    """
+    points = np.asarray(points, dtype=float).reshape(-1, 2)
+    return np.mod(np.arctan2(points[:, 1] - y0, points[:, 0] - x0), 2 * np.pi)
+
+
+def split_arc_array(x0: float, y0: float, r: float, start: tuple[float, float] | np.ndarray,
+                    end: tuple[float, float] | np.ndarray, n: int = 100) -> np.ndarray:
+    """
+    Split an arc into n segments, see split_arc. The arc runs counterclockwise from the start to the end.
+
+    :param x0: The x-coordinate of the center of the circle.
+    :param y0: The y-coordinate of the center of the circle.
+    :param r: The radius of the circle.
+    :param start: The starting point of the arc.
+    :param end: The ending point of the arc.
+    :param n: The number of segments to split the arc into.
+    :return: (n + 1, 2) array of the points of the arc
+    """
+    start_radian, end_radian = cal_radian_array(x0, y0, np.array([start, end], dtype=float))
+    # the same start and end points are the full circle
+    sweep = np.mod(end_radian - start_radian, 2 * np.pi) or 2 * np.pi
+    theta = start_radian + sweep * np.linspace(0, 1, n + 1)
+    return np.column_stack((x0 + r * np.cos(theta), y0 + r * np.sin(theta)))
+
+
+def cal_centroid_array(points: np.ndarray, bias: float = 0.0) -> tuple:
+    """
+    Calculate the centroid of a polygon, see cal_centroid.
+
+    :param points: (N, 2) array of the points of the polygon.
+    :param bias:
+    :return: A tuple containing area and the x and y coordinates of the centroid.
+    """
+    points = np.asarray(points, dtype=float)
+    x, y = points[:, 0], points[:, 1]
+    x2, y2 = np.roll(x, -1), np.roll(y, -1)
+    cross = x * y2 - x2 * y
+
+    area = cross.sum() / 2
+    cx = ((x + x2) * cross).sum() / (6 * area)
+    cy = ((y + y2) * cross).sum() / (6 * area)
+    return float(area), (float(cx * (1 + bias)), float(cy * (1 + bias)))
+
+
+def cal_arcs(circles: list[tuple[float, float, float]]) -> list[tuple[int, np.ndarray, np.ndarray, np.ndarray]]:
+    """
+    Split the boundary of every circle into arcs at its intersection points with the other circles. An arc separates
+    the region inside its circle from the region outside, which differ only in the bit of the circle.
+    :param circles: (x, y, r) of the circles
+    :return: (circle index, start radians, end radians, masks of the other circles containing the arcs) of every
+             circle, the arcs run counterclockwise and the end radians are larger than the start radians
+    """
+    centers = np.array([(x, y) for x, y, _ in circles], dtype=float).reshape(-1, 2)
+    radii = np.array([r for _, _, r in circles], dtype=float)
+
+    arcs = []
+    for k, (x0, y0, r) in enumerate(circles):
+        # the radians of the intersection points on the circle k
+        radians = []
+        for j, (x1, y1, r1) in enumerate(circles):
+            d = math.hypot(x1 - x0, y1 - y0)
+            if j == k or d >= r + r1 or d <= abs(r - r1):
+                continue
+            phi = math.atan2(y1 - y0, x1 - x0)
+            alpha = math.acos(min(1.0, max(-1.0, (r ** 2 + d ** 2 - r1 ** 2) / (2 * r * d))))
+            radians += [phi - alpha, phi + alpha]
+        radians = np.sort(np.mod(radians, 2 * np.pi)) if radians else np.array([0.0])
+        starts = radians
+        ends = np.append(radians[1:], radians[0] + 2 * np.pi)
+
+        # the circles containing the midpoint of every arc
+        middles = (starts + ends) / 2
+        points = np.column_stack((x0 + r * np.cos(middles), y0 + r * np.sin(middles)))
+        inside = np.linalg.norm(points[:, None, :] - centers[None, :, :], axis=2) < radii[None, :]
+        inside[:, k] = False
+        arcs.append((k, starts, ends, (inside * (1 << np.arange(len(circles)))).sum(axis=1)))
+
+    return arcs
+
+
+def cal_region_moments(circles: list[tuple[float, float, float]]) -> dict[int, tuple[float, tuple[float, float]]]:
+    """
+    Calculate the exact area and centroid of every region of overlapping circles. The area and the first moments of
+    the regions are accumulated from the arcs of cal_arcs by green's theorem
+    A = 1/2 * ∮ x dy - y dx, Mx = 1/2 * ∮ x^2 dy, My = -1/2 * ∮ y^2 dx
+    :param circles: (x, y, r) of the circles
+    :return: A dictionary with membership masks as keys, bit i is the i-th circle, and (area, (x, y) of the centroid)
+             of the non-empty regions as values
+    """
+    moments = {}
+    radii = np.array([r for _, _, r in circles], dtype=float)
+
+    for k, starts, ends, masks in cal_arcs(circles):
+        x0, y0, r = circles[k]
+
+        # the integrals of the arcs from the start to the end radian
+        sin_a, sin_b, cos_a, cos_b = np.sin(starts), np.sin(ends), np.cos(starts), np.cos(ends)
+        sweep = ends - starts
+        area = (r ** 2 * sweep + r * x0 * (sin_b - sin_a) - r * y0 * (cos_b - cos_a)) / 2
+        mx = r / 2 * (x0 ** 2 * (sin_b - sin_a) +
+                      2 * x0 * r * (sweep / 2 + (np.sin(2 * ends) - np.sin(2 * starts)) / 4) +
+                      r ** 2 * ((sin_b - sin_b ** 3 / 3) - (sin_a - sin_a ** 3 / 3)))
+        my = r / 2 * (y0 ** 2 * (cos_a - cos_b) +
+                      2 * y0 * r * (sweep / 2 - (np.sin(2 * ends) - np.sin(2 * starts)) / 4) +
+                      r ** 2 * ((cos_b ** 3 / 3 - cos_b) - (cos_a ** 3 / 3 - cos_a)))
+
+        # counterclockwise for the region inside the circle k, clockwise for the region outside
+        for mask, *arc in zip(masks.tolist(), area, mx, my):
+            for region, sign in ((mask | 1 << k, 1), (mask, -1)):
+                if region:
+                    total = moments.setdefault(region, [0.0, 0.0, 0.0])
+                    for i in range(3):
+                        total[i] += sign * arc[i]
+
+    return {mask: (a, (mx / a, my / a)) for mask, (a, mx, my) in moments.items() if a > 1e-12 * radii.max() ** 2}
+
+
+def cal_region_gradients(circles: list[tuple[float, float, float]]) -> dict[int, np.ndarray]:
+    """
+    Calculate the gradient of the area of every region by the centers of the circles. A moved circle shifts its arcs
+    along their normals, so the area of a region changes by the integral of the normal over the arcs of the circle on
+    its boundary, r * (sin b - sin a, cos a - cos b) for an arc from the radian a to b, while the moving intersection
+    points do not change it.
+    :param circles: (x, y, r) of the circles
+    :return: A dictionary with membership masks as keys and (n, 2) arrays of the derivatives of the region area by
+             the center coordinates as values
+    """
+    gradients = {}
+    for k, starts, ends, masks in cal_arcs(circles):
+        r = circles[k][2]
+        dx = r * (np.sin(ends) - np.sin(starts))
+        dy = r * (np.cos(starts) - np.cos(ends))
+
+        # the region inside the circle k grows with the outward shift of its arcs, the region outside shrinks
+        for mask, gx, gy in zip(masks.tolist(), dx.tolist(), dy.tolist()):
+            for region, sign in ((mask | 1 << k, 1), (mask, -1)):
+                if region:
+                    gradient = gradients.get(region)
+                    if gradient is None:
+                        gradient = gradients[region] = np.zeros((len(circles), 2))
+                    gradient[k, 0] += sign * gx
+                    gradient[k, 1] += sign * gy
+
+    return gradients
+
+
+def cal_layout_error(areas: dict[int, float], counts: dict[int, float]) -> tuple[float, dict[int, float]]:
+    """
+    Calculate the error of an area proportional layout. The stress is the sum of the squared residuals of the region
+    areas after fitting the counts to them by least squares, relative to the sum of the squared areas, the error of a
+    region is the difference of its share of the total area and its share of the total count.
+    :param areas: A dictionary with membership masks as keys and the region areas as values
+    :param counts: A dictionary with membership masks as keys and the requested region sizes as values
+    :return: The stress, and a dictionary with the error of every region
+    """
+    masks = sorted(set(areas) | set(counts))
+    a = np.array([areas.get(mask, 0.0) for mask in masks], dtype=float)
+    c = np.array([counts.get(mask, 0.0) for mask in masks], dtype=float)
+    if not a.any() or not c.any():
+        return 0.0 if not a.any() and not c.any() else 1.0, dict.fromkeys(masks, 0.0)
+
+    beta = (a @ c) / (c @ c)
+    stress = float(((a - beta * c) ** 2).sum() / (a ** 2).sum())
+    return stress, dict(zip(masks, (a / a.sum() - c / c.sum()).tolist()))
+
+
+def cal_halton(n: int, base: int) -> np.ndarray:
+    """
+    The first n points of the van der corput sequence of a base, one coordinate of the halton sequence
+    :param n: The number of points
+    :param base: The base, a prime
+    :return: n points in [0, 1)
+    """
+    index = np.arange(1, n + 1)
+    points = np.zeros(n)
+    fraction = 1.0
+    while index.any():
+        fraction /= base
+        index, digit = np.divmod(index, base)
+        points += fraction * digit
+    return points
+
+
+def get_unit_samples(n_points: int, method: str = "halton") -> np.ndarray:
+    """
+    Get the sample points in the unit square, they are generated once per process
+    :param n_points: The number of points, rounded down to a square for the grid
+    :param method: "halton" for the quasi random halton sequence of the bases 2 and 3, or "grid" for the centers of
+                   the cells of a raster
+    :return: (n_points, 2) array of the points
+    """
+    key = (method, n_points)
+    if key not in _samples:
+        if method == "halton":
+            samples = np.column_stack((cal_halton(n_points, 2), cal_halton(n_points, 3)))
+        elif method == "grid":
+            side = max(1, math.isqrt(n_points))
+            axis = (np.arange(side) + 0.5) / side
+            samples = np.stack(np.meshgrid(axis, axis), axis=-1).reshape(-1, 2)
+        else:
+            raise Exception(f"Unknown sampling method: {method}")
+        _samples[key] = samples
+    return _samples[key]
+
+
+def estimate_region_areas(circles: np.ndarray, n_points: int = 65536, method: str = "halton") -> np.ndarray:
+    """
+    Estimate the areas of all regions of circles at once. The sample points cover the bounding box of the circles,
+    the membership mask of every point is calculated by one vectorized test per circle and the points are counted per
+    mask.
+    :param circles: (n, 3) array of (x, y, r)
+    :param n_points: The number of sample points
+    :param method: "halton" or "grid", see get_unit_samples
+    :return: (2 ** n,) array of the region areas indexed by the membership masks, bit i is the i-th circle, the
+             area outside all circles is at index 0
+    """
+    circles = np.asarray(circles, dtype=float).reshape(-1, 3)
+    low = (circles[:, :2] - circles[:, 2:]).min(axis=0)
+    high = (circles[:, :2] + circles[:, 2:]).max(axis=0)
+    points = low + get_unit_samples(n_points, method) * (high - low)
+
+    x, y = points[:, 0], points[:, 1]
+    codes = np.zeros(len(points), dtype=np.intp)
+    for i, (x0, y0, r) in enumerate(circles):
+        codes |= ((x - x0) ** 2 + (y - y0) ** 2 < r ** 2).astype(np.intp) << i
+    counts = np.bincount(codes, minlength=1 << len(circles))
+    return counts * (np.prod(high - low) / len(points))
+
+
+def estimate_layout_error(circles: np.ndarray, counts: dict[int, float], n_points: int = 65536,
+                          method: str = "halton") -> tuple[float, dict[int, float]]:
+    """
+    Estimate the error of an area proportional layout from sampled region areas, see cal_layout_error
+    :param circles: (n, 3) array of (x, y, r)
+    :param counts: A dictionary with membership masks as keys and the requested region sizes as values
+    :param n_points: The number of sample points
+    :param method: "halton" or "grid", see get_unit_samples
+    :return: The stress, and a dictionary with the error of every region
+    """
+    areas = estimate_region_areas(circles, n_points=n_points, method=method)
+    return cal_layout_error({mask: area for mask, area in enumerate(areas.tolist()) if mask and area}, counts)
+
+
 def cal_intersection_ll(x1, y1, x2, y2, x3, y3, x4, y4):
     """
     # 计算两条直线的交点
@@ -0,0 +1,7 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Author   : zhyemqww
+# @Time     : 2026/10/18 23:40
+# @File     : __init__.py
+# @Project  : Toolbox
+# @Desc     :
@@ -0,0 +1,91 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Author   : zhyemqww
+# @Time     : 2026/10/18 23:40
+# @File     : test_batch_export
+# @Project  : Toolbox
+# @Desc     :
+
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+import matplotlib
+
+matplotlib.use("Agg")
+
+import numpy as np
+import pandas as pd
+from matplotlib import pyplot as plt
+
+from src.export.batch_export import batch_export, export_job, render_figure
+
+
+class TestBatchExport(unittest.TestCase):
+
+    def setUp(self):
+        self.venn = {'a': {1, 2, 3, 4}, 'b': {3, 4, 5}, 'c': {4, 5, 6, 7}}
+        self.volcano = pd.DataFrame({"x": np.linspace(-3, 3, 50), "y": np.linspace(0, 5, 50)})
+
+    def test_bytes(self):
+        figures = plt.get_fignums()
+        png = export_job({"plotter": "venn", "data": self.venn})
+        self.assertTrue(png.startswith(b"\x89PNG"))
+        svg = export_job({"plotter": "upset", "data": self.venn, "format": "svg"})
+        self.assertIn(b"<svg", svg)
+        pdf = export_job({"plotter": "volcano", "data": self.volcano, "format": "pdf",
+                          "kwargs": {"title": "t", "x_label": "x", "y_label": "y", "y_threshold": 1}})
+        self.assertTrue(pdf.startswith(b"%PDF"))
+        self.assertEqual(plt.get_fignums(), figures)
+
+    def test_paths(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            jobs = [{"plotter": "venn", "data": self.venn, "path": os.path.join(tmp, f"{i}.png"),
+                     "kwargs": {"up": bool(i % 2)}} for i in range(4)]
+            self.assertEqual(batch_export(jobs, n_jobs=2), [job["path"] for job in jobs])
+            for job in jobs:
+                self.assertGreater(os.path.getsize(job["path"]), 0)
+
+    def test_failed_job(self):
+        def fail(*args, **kwargs):
+            plt.figure()
+            raise Exception("failed")
+
+        figures = plt.get_fignums()
+        with mock.patch("src.export.batch_export.render_figure", side_effect=fail):
+            with self.assertRaises(Exception):
+                export_job({"plotter": "venn", "data": self.venn})
+        self.assertEqual(plt.get_fignums(), figures)
+
+    def test_agg_backend(self):
+        backends = []
+
+        def render(*args, **kwargs):
+            backends.append(matplotlib.get_backend().lower())
+            return render_figure(*args, **kwargs)
+
+        plt.switch_backend("svg")
+        try:
+            with mock.patch("src.export.batch_export.render_figure", side_effect=render):
+                svg = batch_export([{"plotter": "venn", "data": self.venn, "format": "svg"}])
+            self.assertIn(b"<svg", svg[0])
+            self.assertEqual(backends, ["agg"])
+            self.assertEqual(matplotlib.get_backend().lower(), "svg")
+        finally:
+            plt.switch_backend("Agg")
+
+    def test_no_matplotlib(self):
+        code = "import sys, src.export.batch_export; print('matplotlib' in sys.modules)"
+        output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout
+        self.assertEqual(output.strip(), "False")
+
+    def test_unknown_plotter(self):
+        with self.assertRaises(Exception):
+            export_job({"plotter": "pie", "data": self.venn})
+
+
+if __name__ == '__main__':
+    unittest.main()
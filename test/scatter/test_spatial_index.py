@@ -0,0 +1,40 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Author   : zhyemqww
+# @Time     : 2026/10/19 01:20
+# @File     : test_spatial_index
+# @Project  : Toolbox
+# @Desc     :
+
+import unittest
+
+import numpy as np
+
+from src.scatter.spatial_index import GridIndex
+
+
+class TestGridIndex(unittest.TestCase):
+
+    def test_query(self):
+        rng = np.random.default_rng(0)
+        x, y = rng.normal(0, 1.5, 20000), rng.random(20000) ** 3 * 8
+        index = GridIndex(x, y)
+        for a, b in np.c_[rng.normal(0, 3, 200), rng.normal(4, 6, 200)]:
+            for scale in ((1, 1), (80, 20)):
+                distances = np.hypot((x - a) * scale[0], (y - b) * scale[1])
+                self.assertEqual(distances[index.query(a, b, scale=scale)], distances.min())
+                found = index.query(a, b, max_distance=2, scale=scale)
+                self.assertEqual(found is None, distances.min() > 2)
+
+    def test_degenerate(self):
+        self.assertIsNone(GridIndex(np.array([]), np.array([])).query(0, 0))
+        self.assertEqual(GridIndex(np.array([1.0, 1.0]), np.array([2.0, 2.0])).query(5, 5), 0)
+        index = GridIndex(np.array([np.nan, 3.0, 0.0]), np.array([0.0, 3.0, np.nan]))
+        self.assertEqual(len(index), 1)
+        self.assertEqual(index.query(0, 0), 1)
+        with self.assertRaises(Exception):
+            GridIndex(np.zeros(2), np.zeros(3))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Author   : zhyemqww
+# @Time     : 2026/10/19 00:10
+# @File     : test_volcano
+# @Project  : Toolbox
+# @Desc     :
+
+import subprocess
+import sys
+import unittest
+
+import matplotlib
+import numpy as np
+import pandas as pd
+from matplotlib import pyplot as plt
+from matplotlib.backend_bases import MouseEvent
+from matplotlib.collections import PathCollection, PolyCollection, QuadMesh
+
+from src.scatter.volcano import Volcano
+
+
+class TestVolcano(unittest.TestCase):
+
+    def setUp(self):
+        self.data = pd.DataFrame({"x": [-2.0, -0.5, 0.0, 0.5, 2.0, 2.0],
+                                  "y": [3.0, 3.0, 0.5, 3.0, 3.0, 0.5]})
+
+    def test_classify(self):
+        labels = Volcano.classify(self.data, y_threshold=1, x_max_threshold=1, x_min_threshold=-1)
+        self.assertEqual(labels.dtype, np.int8)
+        self.assertEqual(labels.tolist(), [Volcano.DOWN, 0, 0, 0, Volcano.UP, 0])
+
+    def test_classify_partial_thresholds(self):
+        self.assertEqual(Volcano.classify(self.data, y_threshold=1).tolist(), [1, 1, 0, 1, 1, 0])
+        self.assertEqual(Volcano.classify(self.data, x_max_threshold=1).tolist(), [0, 0, 0, 0, 1, 1])
+        self.assertEqual(Volcano.classify(self.data, y_threshold=1, x_min_threshold=-1).tolist(), [-1, 0, 0, 0, 0, 0])
+        self.assertEqual(Volcano.classify(self.data).tolist(), [0] * 6)
+
+    def test_classify_duplicate_index(self):
+        data = self.data.set_axis([0, 0, 1, 1, 2, 2])
+        labels = Volcano.classify(data, y_threshold=1, x_max_threshold=1, x_min_threshold=-1)
+        self.assertEqual(labels.tolist(), [Volcano.DOWN, 0, 0, 0, Volcano.UP, 0])
+
+    def test_plot_large(self):
+        matplotlib.use("Agg")
+        rng = np.random.default_rng(0)
+        data = pd.DataFrame({"x": rng.normal(0, 1.5, 5000), "y": rng.random(5000) * 4})
+        kwargs = dict(y_threshold=2, x_max_threshold=2, x_min_threshold=-2, show=False)
+
+        fig = Volcano.plot(data, "t", "x", "y", **kwargs)
+        scatters = [c for c in fig.axes[0].collections if isinstance(c, PathCollection)]
+        self.assertTrue(all(c.get_picker() and not c.get_rasterized() for c in scatters))
+        plt.close(fig)
+
+        fig = Volcano.plot(data, "t", "x", "y", large_threshold=1000, **kwargs)
+        normal, up, down = fig.axes[0].collections
+        self.assertTrue(normal.get_rasterized())
+        self.assertFalse(normal.get_picker())
+        self.assertTrue(up.get_picker() and down.get_picker())
+        plt.close(fig)
+
+        for density, layer in (("hexbin", PolyCollection), ("hist2d", QuadMesh)):
+            fig = Volcano.plot(data, "t", "x", "y", large_threshold=1000, density=density, **kwargs)
+            collections = fig.axes[0].collections
+            self.assertIsInstance(collections[0], layer)
+            self.assertEqual(sum(c.get_picker() is True for c in collections), 2)
+            plt.close(fig)
+
+        with self.assertRaises(Exception):
+            Volcano.plot(data, "t", "x", "y", density="kde", **kwargs)
+
+    def test_plot_lookup(self):
+        matplotlib.use("Agg")
+        data = self.data.set_axis(list("abcdef"))
+        picked, hovered = [], []
+        fig = Volcano.plot(data, "t", "x", "y", y_threshold=1, show=False, on_pick=picked.append,
+                           on_hover=hovered.append)
+        ax = fig.axes[0]
+        fig.canvas.draw()
+
+        def send(name, x, y, **kwargs):
+            px, py = ax.transData.transform((x, y))
+            fig.canvas.callbacks.process(name, MouseEvent(name, fig.canvas, px, py, **kwargs))
+
+        send("button_press_event", 2.0, 0.5, button=1)
+        send("motion_notify_event", 0.5, 3.0)
+        send("motion_notify_event", 0.5, 3.0)
+        send("motion_notify_event", 1.2, 1.8)
+        self.assertEqual([row.name for row in picked], ["f"])
+        self.assertEqual([None if row is None else row.name for row in hovered], ["d", None])
+        # the index resolves the clicks, matplotlib does not test the points
+        self.assertFalse(any(collection.get_picker() for collection in ax.collections))
+        plt.close(fig)
+
+        fig = Volcano.plot(data, "t", "x", "y", y_threshold=1, show=False)
+        self.assertTrue(all(collection.get_picker() for collection in fig.axes[0].collections))
+        plt.close(fig)
+
+    def test_import_lazy(self):
+        # matplotlib and pandas are only imported by the first plot
+        code = "import sys, src.scatter.volcano; print('matplotlib' in sys.modules or 'pandas' in sys.modules)"
+        output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout
+        self.assertEqual(output.strip(), "False")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -6,9 +6,28 @@
 # @Project  : Toolbox
 # @Desc     :
 
+import copy
+import random
 import unittest
+from unittest import mock
 
-from src.venn.decode_venn_data import decode_venn_data
+import numpy as np
+
+from src.venn.decode_venn_data import decode_venn_data, decode_venn_counts, cal_intersection, cal_membership, cal_membership_groups, \
+    VennRegions
+from src.venn.decode_venn_parallel import split_shards
+
+
+def decode_venn_data_reference(data: dict) -> dict:
+    """
+    Level by level decoding with cal_intersection, used as the reference result
+    """
+    data = {k: set(v) for k, v in copy.deepcopy(data).items()}
+    intersections = {}
+    for level in range(len(data), 0, -1):
+        data, intersection = cal_intersection(data.keys(), data, level)
+        intersections.update(intersection)
+    return intersections
 
 
 class TestDecodeVennData(unittest.TestCase):
@@ -49,5 +68,129 @@ class TestDecodeVennData(unittest.TestCase):
         result = decode_venn_data(data)
         self.assertEqual(result, expected)
 
+    def test_membership_mask(self):
+        data = {'a': {1, 2, 3}, 'b': [2, 3, 3, 4], 'c': {3}}
+        masks = cal_membership(data)
+        self.assertEqual(masks, {1: 0b001, 2: 0b011, 3: 0b111, 4: 0b010})
+        self.assertEqual(cal_membership_groups(masks), {0b001: {1}, 0b011: {2}, 0b111: {3}, 0b010: {4}})
+
+    def test_same_as_level_decoding(self):
+        rng = random.Random(0)
+        for n in range(1, 7):
+            data = {f"s{i}": {rng.randint(0, 40) for _ in range(rng.randint(0, 25))} for i in range(n)}
+            expected = decode_venn_data_reference(data)
+            result = decode_venn_data(data)
+            self.assertEqual(result, expected)
+            self.assertEqual(list(result), list(expected))
+
+    def test_wide_collection(self):
+        data = {f"s{i}": set(range(i, 200, i + 1)) for i in range(14)}
+        result = decode_venn_data(data)
+        self.assertEqual(len(result), 2 ** 14 - 1)
+        self.assertEqual(set().union(*result.values()), set().union(*data.values()))
+
+    def test_sparse_regions(self):
+        rng = random.Random(1)
+        data = {f"s{i}": {rng.randint(0, 30) for _ in range(10)} for i in range(8)}
+        dense = decode_venn_data(data)
+        result = decode_venn_data(data, sparse=True)
+        self.assertIsInstance(result, VennRegions)
+        self.assertEqual(list(result), [k for k, v in dense.items() if v])
+        self.assertEqual(result, {k: v for k, v in dense.items() if v})
+        self.assertLess(len(result), len(dense))
+
+    def test_sparse_regions_absent_key(self):
+        result = decode_venn_data({'a': {1, 2}, 'b': {2}, 'c': {5}}, sparse=True)
+        self.assertEqual(result[('a', 'c')], set())
+        self.assertEqual(result[('a', 'b')], {2})
+        self.assertNotIn(('a', 'c'), result)
+        self.assertIn(('c',), result)
+        with self.assertRaises(KeyError):
+            _ = result[('c', 'a')]
+        with self.assertRaises(KeyError):
+            _ = result[('d',)]
+
+    def test_counts(self):
+        rng = random.Random(2)
+        data = {f"s{i}": [rng.randint(0, 50) for _ in range(30)] for i in range(5)}
+        dense = decode_venn_data(data)
+        self.assertEqual(decode_venn_counts(data), {k: len(v) for k, v in dense.items()})
+        sparse = decode_venn_counts(data, sparse=True)
+        self.assertEqual(sparse, {k: len(v) for k, v in dense.items() if v})
+        self.assertEqual(sparse[('s0', 's1', 's2', 's3', 's4')], len(dense[('s0', 's1', 's2', 's3', 's4')]))
+
+    def test_numpy_backend(self):
+        rng = random.Random(3)
+        for n in range(1, 7):
+            data = {f"s{i}": {rng.randint(0, 40) for _ in range(rng.randint(0, 25))} for i in range(n)}
+            self.assertEqual(decode_venn_data(data, backend="numpy"), decode_venn_data(data))
+            self.assertEqual(decode_venn_counts(data, backend="numpy"), decode_venn_counts(data))
+
+    def test_numpy_backend_wide_collection(self):
+        rng = random.Random(4)
+        data = {f"s{i}": {rng.randint(0, 300) for _ in range(20)} for i in range(70)}
+        self.assertEqual(decode_venn_data(data, sparse=True, backend="numpy"), decode_venn_data(data, sparse=True))
+
+    def test_numpy_backend_strings(self):
+        data = {'a': ['x', 'y', 'z'], 'b': ('y', 'z', 'w'), 'c': set()}
+        self.assertEqual(decode_venn_data(data, backend="numpy"), decode_venn_data(data))
+        with self.assertRaises(Exception):
+            decode_venn_data({'a': {1, 'x'}}, backend="numpy")
+
+    def test_numpy_backend_mixed_numbers(self):
+        # 2 ** 53 + 1 is not a float64, the integers must neither merge with floats nor come back as floats
+        for data in ({'a': {2 ** 53 + 1}, 'b': {2 ** 53, 0.5}}, {'a': {2 ** 53 + 1, 2 ** 53, 0.5}, 'b': {2 ** 53}},
+                     {'a': np.array([2 ** 63], dtype=np.uint64), 'b': np.array([-1, 5])}):
+            expected = decode_venn_data({k: set(v.tolist()) if isinstance(v, np.ndarray) else v
+                                         for k, v in data.items()})
+            result = decode_venn_data(data, backend="numpy")
+            self.assertEqual(result, expected)
+            for k, v in result.items():
+                self.assertEqual(sorted(map(type, v), key=str), sorted(map(type, expected[k]), key=str))
+        self.assertEqual(decode_venn_counts({'a': {1, 2.5}, 'b': {1.0, 2}}, backend="numpy"),
+                         decode_venn_counts({'a': {1, 2.5}, 'b': {1.0, 2}}))
+
+    def test_numpy_backend_empty_set(self):
+        # an empty set must not turn the integers of the other sets into floats
+        for data in ({'a': {2 ** 60 + 1, 2 ** 60, 3}, 'b': set()}, {'a': [1, 2, 3], 'b': []},
+                     {'a': np.array([2 ** 60 + 1, 2 ** 60]), 'b': np.array([], dtype=np.uint8), 'c': []}):
+            sets = {k: set(v.tolist()) if isinstance(v, np.ndarray) else set(v) for k, v in data.items()}
+            result = decode_venn_data(data, backend="numpy")
+            self.assertEqual(result, decode_venn_data(sets))
+            for v in result.values():
+                self.assertTrue(all(type(ele) is int for ele in v))
+            self.assertEqual(decode_venn_counts(data, backend="numpy"), decode_venn_counts(sets))
+
+    def test_parallel(self):
+        rng = random.Random(5)
+        data = {f"s{i}": {rng.randint(0, 500) for _ in range(100)} | {str(rng.randint(0, 9))} for i in range(6)}
+        data["big"] = set(range(-300, 2000))
+        # the small data is decoded serially unless the threshold is lowered
+        with mock.patch("src.venn.decode_venn_parallel.MIN_PARALLEL_SIZE", 0):
+            self.assertEqual(decode_venn_data(data, n_jobs=3), decode_venn_data(data))
+            self.assertEqual(decode_venn_counts(data, sparse=True, n_jobs=2), decode_venn_counts(data, sparse=True))
+        self.assertEqual(decode_venn_counts(data, n_jobs=4), decode_venn_counts(data))
+
+    def test_split_shards(self):
+        shards = split_shards([{1, 2, 3, "a"}, {3, "a", 5}], 3)
+        self.assertEqual(len(shards), 3)
+        for i, value in enumerate([{1, 2, 3, "a"}, {3, "a", 5}]):
+            self.assertEqual(sorted((ele for shard in shards for ele in shard[i]), key=str), sorted(value, key=str))
+        # the same element is in the same shard of every set
+        for shard in shards:
+            self.assertTrue(set(shard[1]) & {3, "a"} <= set(shard[0]))
+
+    def test_filters(self):
+        rng = random.Random(6)
+        data = {f"s{i}": {rng.randint(0, 100) for _ in range(40)} for i in range(6)}
+        counts = decode_venn_counts(data)
+        ranked = sorted(counts, key=counts.get, reverse=True)
+        self.assertEqual(list(decode_venn_counts(data, top_k=7)), [k for k in counts if k in ranked[:7]])
+        self.assertEqual(decode_venn_data(data, top_k=7), {k: v for k, v in decode_venn_data(data).items()
+                                                            if k in ranked[:7]})
+        self.assertEqual(decode_venn_counts(data, min_size=3, max_degree=2),
+                         {k: v for k, v in counts.items() if v >= 3 and len(k) <= 2})
+
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,111 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Author   : zhyemqww
+# @Time     : 2026/10/18 20:30
+# @File     : test_decode_venn_stream
+# @Project  : Toolbox
+# @Desc     :
+
+import os
+import random
+import tempfile
+import unittest
+
+from src.venn.decode_venn_data import cal_membership, decode_venn_data, decode_venn_counts
+from src.venn.decode_venn_stream import ColumnSource, VennDecoder, decode_venn_stream
+
+
+class TestDecodeVennStream(unittest.TestCase):
+
+    def setUp(self):
+        rng = random.Random(0)
+        self.data = {f"s{i}": [str(rng.randint(0, 80)) for _ in range(60)] for i in range(4)}
+
+    def test_iterables(self):
+        sources = {k: iter(v) for k, v in self.data.items()}
+        self.assertEqual(decode_venn_stream(sources, chunk_size=7), decode_venn_data(self.data))
+
+    def test_counts_only(self):
+        sources = {k: iter(v) for k, v in self.data.items()}
+        result = decode_venn_stream(sources, counts_only=True, sparse=True, chunk_size=7)
+        self.assertEqual(result, decode_venn_counts(self.data, sparse=True))
+
+    def test_files(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            sources = {}
+            for k, v in self.data.items():
+                sources[k] = os.path.join(tmp, f"{k}.txt")
+                with open(sources[k], "w", encoding="utf-8") as f:
+                    f.write("\n".join(v) + "\n\n")
+            self.assertEqual(decode_venn_stream(sources, chunk_size=10), decode_venn_data(self.data))
+
+    def test_columns(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "ids.tsv")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write("a\tb\n1\t2\n2\t\n3\t4\n")
+            result = decode_venn_stream({"a": ColumnSource(path, "a"), "b": ColumnSource(path, "b")}, sep="\t")
+            self.assertEqual(result, {("a", "b"): {"2"}, ("a",): {"1", "3"}, ("b",): {"4"}})
+
+    def test_tuple_source(self):
+        # plain tuples are elements, not a file and a column
+        result = decode_venn_stream({"a": ("x", "y"), "b": ("y", 1)})
+        self.assertEqual(result, {("a", "b"): {"y"}, ("a",): {"x"}, ("b",): {1}})
+
+    def test_incremental_counts(self):
+        decoder = VennDecoder()
+        decoder.update("a", [1, 2, 3])
+        self.assertEqual(decoder.counts(), {("a",): 3})
+        decoder.update("b", [3, 4])
+        decoder.update("a", [4, 4])
+        self.assertEqual(decoder.counts(), {("a", "b"): 2, ("a",): 2, ("b",): 0})
+
+    def test_remove_label(self):
+        decoder = VennDecoder(keep_members=True)
+        for k, v in self.data.items():
+            decoder.update(k, v)
+        decoder.remove_label("s1", self.data["s1"])
+        decoder.update("t", ["1", "2", "3"])
+        decoder.update("s1", self.data["s1"][:10])
+        data = {k: v for k, v in self.data.items() if k != "s1"}
+        data["t"] = ["1", "2", "3"]
+        data["s1"] = self.data["s1"][:10]
+        # the combinations are in the order of the identifiers, the slot of s1 is reused by t
+        self.assertEqual(list(decoder.regions()), list(decode_venn_data(data)))
+        self.assertEqual(decoder.regions(), decode_venn_data(data))
+        self.assertEqual(decoder.counts(sparse=True), decode_venn_counts(data, sparse=True))
+
+    def test_none_label(self):
+        decoder = VennDecoder()
+        decoder.update(None, [1, 2])
+        decoder.update("a", [2, 3])
+        decoder.remove_label("a", [2, 3])
+        decoder.update("b", [1])
+        self.assertEqual(decoder.counts(), decode_venn_counts({None: [1, 2], "b": [1]}))
+
+    def test_from_masks(self):
+        data = {"a": [1, 2, 3], "b": [3, 4], "c": [4, 5]}
+        decoder = VennDecoder.from_masks(list(data), cal_membership(data), keep_members=True)
+        self.assertEqual(decoder.pop_changes(), [])
+        self.assertEqual(decoder.regions(), decode_venn_data(data))
+        decoder.update("d", [5, 6])
+        decoder.remove_label("a", data["a"])
+        self.assertEqual(decoder.regions(), decode_venn_data({"b": [3, 4], "c": [4, 5], "d": [5, 6]}))
+
+    def test_pop_changes(self):
+        decoder = VennDecoder()
+        decoder.update("a", [1, 2, 3])
+        decoder.update("b", [3, 4])
+        decoder.pop_changes()
+        # only the regions touched by the chunk are reported
+        decoder.update("c", [4, 5])
+        self.assertEqual(sorted(decoder.pop_changes(), key=str),
+                         sorted([(("b",), 0, None), (("b", "c"), 1, None), (("c",), 1, None)], key=str))
+        decoder.remove_label("b", [3, 4])
+        changes = {key: size for key, size, _ in decoder.pop_changes()}
+        self.assertEqual(changes, {("a", "b"): 0, ("b", "c"): 0, ("a",): 3, ("c",): 2})
+        self.assertEqual(decoder.pop_changes(), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
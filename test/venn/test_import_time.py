@@ -0,0 +1,48 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Author   : zhyemqww
+# @Time     : 2026/10/19 06:20
+# @File     : test_import_time
+# @Project  : Toolbox
+# @Desc     :
+
+import json
+import subprocess
+import sys
+import unittest
+
+# the import time budgets in seconds, generous for slow machines, a plotting backend alone exceeds them
+BUDGETS = {"src.venn.decode_venn_data": 0.5, "src.venn.venn": 1.0, "src.venn.upset": 1.0}
+
+
+def import_module(module: str) -> tuple[float, list[str]]:
+    """
+    Import a module in a fresh interpreter
+    :return: The import time and the heavy dependencies it loaded
+    """
+    code = (f"import json, sys, time\n"
+            f"t = time.perf_counter()\n"
+            f"import {module}\n"
+            f"t = time.perf_counter() - t\n"
+            f"print(json.dumps([t, [m for m in ('matplotlib', 'pandas', 'numpy') if m in sys.modules]]))")
+    output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout
+    seconds, modules = json.loads(output)
+    return seconds, modules
+
+
+class TestImportTime(unittest.TestCase):
+
+    def test_import_time(self):
+        for module, budget in BUDGETS.items():
+            with self.subTest(module=module):
+                seconds, modules = import_module(module)
+                self.assertNotIn("matplotlib", modules)
+                self.assertNotIn("pandas", modules)
+                self.assertLess(seconds, budget)
+
+    def test_decode_without_numpy(self):
+        self.assertNotIn("numpy", import_module("src.venn.decode_venn_data")[1])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Author   : zhyemqww
+# @Time     : 2026/10/19 02:50
+# @File     : test_lens_table
+# @Project  : Toolbox
+# @Desc     :
+
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from src.venn.lens_table import LensTable, get_lens_table, cal_distance_table
+from src.venn.venn_utils import cal_distance, cal_distance_batch
+
+
+class TestLensTable(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.s1, self.s2, self.a = rng.uniform(0, 1000, (3, 2000))
+        self.a[:5] = 0
+        self.s1[5:10] = 0
+
+    def test_accuracy(self):
+        table = LensTable.build(65)
+        for normalization in (True, False):
+            expected = cal_distance_batch(self.s1, self.s2, self.a, normalization=normalization, full_output=True)
+            result = table.cal_distance(self.s1, self.s2, self.a, normalization=normalization, full_output=True)
+            self.assertTrue(result[3].converged.all())
+            for x, y in zip(result[:3], expected[:3]):
+                np.testing.assert_allclose(x, y, rtol=1e-9, atol=1e-12)
+            self.assertLess(result[3].iterations.mean(), expected[3].iterations.mean())
+
+        r1, r2, d = cal_distance_table(100, 50, 30)
+        self.assertAlmostEqual(d, cal_distance(100, 50, 30)[2])
+
+    def test_lookup(self):
+        table = LensTable.build(33)
+        # no overlap is the sum of the radii, full overlap the difference
+        np.testing.assert_allclose(table.lookup([0.2, 0.7, 1.0], [0, 0, 0]), 1)
+        np.testing.assert_allclose(table.lookup([0.2, 0.7, 1.0], [1, 1, 1]), 0, atol=1e-12)
+        # equal circles at half overlap lie between the grid points
+        r1, r2, d = cal_distance(1, 1, 1)
+        self.assertAlmostEqual(float(table.lookup(1.0, 1 / 2)), d / 2, places=3)
+        with self.assertRaises(Exception):
+            LensTable(np.zeros(3))
+
+    def test_disk_cache(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "lens.npy")
+            built = get_lens_table(path, size=17)
+            self.assertTrue(os.path.exists(path))
+            self.assertIs(get_lens_table(path, size=17), built)
+            loaded = LensTable.load(path)
+            self.assertEqual(loaded.table.shape, (17, 17))
+            np.testing.assert_allclose(loaded.table, built.table, atol=1e-6)
+
+    def test_disk_cache_extension(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "lens")
+            get_lens_table(path, size=9)
+            self.assertEqual(os.listdir(tmp), ["lens.npy"])
+            # a file of another size is rebuilt
+            self.assertEqual(get_lens_table(path + ".npy", size=11).table.shape, (11, 11))
+            self.assertEqual(LensTable.load(path + ".npy").table.shape, (11, 11))
+
+    def test_list_table(self):
+        table = LensTable([[0.0, 1.0], [0.5, 0.5]])
+        self.assertEqual(table.table.shape, (2, 2))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,174 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Author   : zhyemqww
+# @Time     : 2026/10/18 19:20
+# @File     : test_upset
+# @Project  : Toolbox
+# @Desc     :
+
+import random
+import unittest
+from unittest import mock
+
+import matplotlib
+
+matplotlib.use("Agg")
+
+from matplotlib import pyplot as plt
+
+from src.venn.upset import Upset
+
+
+class TestUpset(unittest.TestCase):
+
+    def setUp(self):
+        rng = random.Random(0)
+        self.data = {f"s{i}": {rng.randint(0, 60) for _ in range(25)} for i in range(5)}
+
+    def test_decode_data_counts_only(self):
+        members = Upset()
+        members.decode_data(self.data)
+        counts = Upset()
+        counts.decode_data(self.data, keep_members=False)
+        self.assertEqual(counts.intersection_size, {k: len(v) for k, v in members.intersections.items()})
+        self.assertEqual(counts.intersection_order, members.intersection_order)
+        self.assertEqual(counts.intersection_matrix.tolist(), members.intersection_matrix.tolist())
+        # the element sets are only decoded when they are asked for
+        self.assertIsNone(counts._intersections)
+        self.assertEqual(dict(counts.intersections), dict(members.intersections))
+
+    def test_decode_data_ignore_empty_set(self):
+        upset = Upset()
+        upset.decode_data({'a': {1, 2}, 'b': {2, 3}, 'c': {4}})
+        self.assertEqual(upset.intersection_count, 4)
+        self.assertEqual(upset.intersection_size, {('a', 'b'): 1, ('a',): 1, ('b',): 1, ('c',): 1})
+
+        upset.decode_data({'a': {1, 2}, 'b': {2, 3}, 'c': {4}}, ignore_empty_set=False)
+        self.assertEqual(upset.intersection_count, 7)
+
+    def assert_same_decoding(self, upset: Upset, data: dict, **kwargs):
+        expected = Upset()
+        expected.decode_data(data, **kwargs)
+        self.assertEqual(upset.set_size_sorted, expected.set_size_sorted)
+        self.assertEqual(upset.intersection_size, expected.intersection_size)
+        self.assertEqual(upset.intersection_order, expected.intersection_order)
+        self.assertEqual(upset.intersection_matrix.tolist(), expected.intersection_matrix.tolist())
+        if expected.intersections is not None:
+            self.assertEqual(dict(upset.intersections), dict(expected.intersections))
+            for key in expected.intersection_order:
+                self.assertEqual(upset.intersections[key], expected.intersections[key])
+
+    def test_add_remove_set(self):
+        for keep_members in (True, False):
+            upset = Upset()
+            upset.decode_data(self.data, keep_members=keep_members)
+
+            upset.remove_set("s1")
+            data = {k: v for k, v in self.data.items() if k != "s1"}
+            self.assert_same_decoding(upset, data, keep_members=keep_members)
+
+            upset.add_set("t", {1, 2, 3, 100})
+            data["t"] = {1, 2, 3, 100}
+            self.assert_same_decoding(upset, data, keep_members=keep_members)
+
+            # a replaced set is moved to the end
+            upset.add_set("s0", {1, 200})
+            data.pop("s0")
+            data["s0"] = {1, 200}
+            self.assert_same_decoding(upset, data, keep_members=keep_members)
+
+    def test_add_remove_set_order(self):
+        # a removed and added again set is the last one, as in a dictionary
+        for intersection_sort in (True, False):
+            upset = Upset()
+            upset.decode_data(self.data, intersection_sort=intersection_sort)
+            upset.remove_set("s1")
+            upset.add_set("t", {1, 2, 3, 100})
+            upset.add_set("s1", self.data["s1"])
+            data = {k: v for k, v in self.data.items() if k != "s1"}
+            data["t"] = {1, 2, 3, 100}
+            data["s1"] = self.data["s1"]
+            self.assert_same_decoding(upset, data, intersection_sort=intersection_sort)
+
+    def test_first_update_changes(self):
+        upset = Upset()
+        upset.decode_data(self.data)
+        # an element of no other set only creates the region of the new set
+        with mock.patch.object(Upset, "sort_key", autospec=True, side_effect=Upset.sort_key) as sort_key:
+            upset.add_set("t", {1000})
+        self.assertEqual(sort_key.call_count, 1)
+        self.assert_same_decoding(upset, {**self.data, "t": {1000}})
+
+    def test_add_set_keep_empty_set(self):
+        upset = Upset()
+        upset.decode_data({'a': {1, 2}, 'b': {2, 3}}, ignore_empty_set=False)
+        upset.add_set('c', {3, 4})
+        self.assertEqual(upset.intersection_count, 7)
+        self.assertEqual(upset.intersection_size[('a', 'b', 'c')], 0)
+        self.assertEqual(upset.intersection_size[('b', 'c')], 1)
+
+    def test_top_k(self):
+        full = Upset()
+        full.decode_data(self.data)
+        for keep_members in (True, False):
+            upset = Upset()
+            upset.decode_data(self.data, top_k=5, keep_members=keep_members)
+            self.assertEqual(upset.intersection_order, full.intersection_order[:5])
+            self.assertEqual(upset.intersection_count, 5)
+
+    def test_min_size_max_degree(self):
+        full = Upset()
+        full.decode_data(self.data, intersection_sort=False)
+        upset = Upset()
+        upset.decode_data(self.data, intersection_sort=False, min_size=2, max_degree=2)
+        self.assertEqual(upset.intersection_order,
+                         [k for k in full.intersection_order if full.intersection_size[k] >= 2 and len(k) <= 2])
+
+    def test_filters_after_update(self):
+        upset = Upset()
+        upset.decode_data(self.data, top_k=3)
+        upset.add_set("t", set(range(60)))
+        expected = Upset()
+        expected.decode_data({**self.data, "t": set(range(60))}, top_k=3)
+        self.assertEqual(upset.intersection_size, expected.intersection_size)
+
+    def test_plot_update(self):
+        upset = Upset()
+        plt.close(upset.plot(self.data, show=False))
+        # the plot is drawn from the sizes, the updates keep counting only
+        upset.add_set("t", {1, 2, 3, 100})
+        decoder = upset.decoder
+        plt.close(upset.plot(show=False))
+        self.assertIsNone(upset._intersections)
+        self.assertIs(upset.decoder, decoder)
+        self.assertFalse(upset.decode_options["keep_members"])
+        # the element sets are decoded on access, and again after an update
+        data = {**self.data, "t": {1, 2, 3, 100}}
+        self.assert_same_decoding(upset, data)
+        upset.remove_set("s2")
+        data.pop("s2")
+        self.assert_same_decoding(upset, data)
+
+    def test_intersection_matrix(self):
+        sets = ['a', 'b', 'c']
+        matrix = Upset.cal_intersection_matrix(sets, [('a', 'b'), ('c',), ('a', 'b', 'c')])
+        self.assertEqual(matrix.tolist(), [[3, 0, 3], [2, 0, 2], [0, 1, 1]])
+
+    def test_intersection_matrix_wide(self):
+        sets = [f"s{i}" for i in range(70)]
+        intersections = [('s0', 's69'), ('s63', 's64'), ('s5',)]
+        matrix = Upset.cal_intersection_matrix(sets, intersections)
+        self.assertEqual(matrix.shape, (70, 3))
+        for j, inter in enumerate(intersections):
+            self.assertEqual(matrix[:, j].nonzero()[0].tolist(), sorted(sets.index(s) for s in inter))
+            for s in inter:
+                self.assertEqual(matrix[sets.index(s), j], 70 - sets.index(s))
+
+    def test_label_stride(self):
+        self.assertEqual(Upset.cal_label_stride(10, 8, 20), 1)
+        self.assertEqual(Upset.cal_label_stride(1000, 8, 20), 35)
+        self.assertEqual(Upset.cal_label_stride(0, 8, 20), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,61 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Author   : zhyemqww
+# @Time     : 2026/10/19 03:40
+# @File     : test_venn
+# @Project  : Toolbox
+# @Desc     :
+
+import random
+import unittest
+from unittest import mock
+
+import matplotlib
+from matplotlib import pyplot as plt
+
+from src.venn.venn import Venn
+from src.venn.venn_layout import layout_venn
+
+
+class TestVenn(unittest.TestCase):
+
+    def setUp(self):
+        matplotlib.use("Agg")
+        rng = random.Random(0)
+        self.data = {k: {rng.randint(0, 300) for _ in range(120)} for k in "abc"}
+
+    def tearDown(self):
+        plt.close("all")
+
+    def test_draw_area_error(self):
+        for up in (True, False):
+            fig, (stress, errors) = Venn.draw_area(self.data, show=False, up=up, full_output=True)
+            self.assertEqual(sorted(errors), list(range(1, 8)))
+            self.assertLess(stress, 0.1)
+            # every region is labelled with its count
+            self.assertEqual(len(fig.axes[0].texts), 3 + 7)
+
+        fig, (stress, errors) = Venn.draw_area({"a": {1, 2, 3}, "b": {3, 4}}, show=False, full_output=True)
+        self.assertAlmostEqual(stress, 0)
+        self.assertEqual(sorted(errors), [1, 2, 3])
+
+    def test_draw_area_layout(self):
+        rng = random.Random(0)
+        data = {f"s{i}": {rng.randint(0, 1000) for _ in range(300)} for i in range(5)}
+        fig, (stress, errors) = Venn.draw_area(data, show=False, full_output=True, time_budget=0.3)
+        self.assertEqual(len(fig.axes[0].patches), 5)
+        self.assertLess(stress, 0.3)
+
+        # the pairwise distances of these sets do not form a triangle
+        data = {"a": set(range(100)), "b": set(range(10, 110)), "c": set(range(0, 10)) | set(range(200, 210))}
+        with mock.patch("src.venn.venn_geometry.layout_venn", wraps=layout_venn) as layout:
+            fig, (stress, errors) = Venn.draw_area(data, show=False, full_output=True, time_budget=0.3, cache=False)
+        layout.assert_called_once()
+        self.assertLess(stress, 0.1)
+
+        with self.assertRaises(Exception):
+            Venn.draw_area({f"s{i}": {i} for i in range(7)}, show=False)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,118 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Author   : zhyemqww
+# @Time     : 2026/10/18 21:40
+# @File     : test_venn_cache
+# @Project  : Toolbox
+# @Desc     :
+
+import os
+import tempfile
+import unittest
+
+from src.venn.decode_venn_data import decode_venn_data, decode_venn_counts
+from src.venn.venn_geometry import cal_venn_geometry
+from src.venn.venn_cache import DecodeCache, LayoutCache, checksum, decode_cache, fingerprint, quantize_counts
+
+
+class TestVennCache(unittest.TestCase):
+
+    def test_fingerprint(self):
+        self.assertEqual(fingerprint({'a': {1, 2, 3}, 'b': [4, 5]}), fingerprint({'a': [3, 2, 1], 'b': (5, 4, 4)}))
+        self.assertNotEqual(fingerprint({'a': {1, 2, 3}}), fingerprint({'a': {1, 2, 4}}))
+        self.assertNotEqual(fingerprint({'a': {1}, 'b': {2}}), fingerprint({'b': {2}, 'a': {1}}))
+        # the fingerprint and the checksum hold no copy of the sets
+        for value in fingerprint({'a': set(range(1000))})[0] + checksum({'a': set(range(1000))}):
+            self.assertIsInstance(value, (str, int))
+
+    def test_hash_collision(self):
+        # hash(-1) == hash(-2), so both sets a have the same hash, they must not share a cached result
+        first, second = {'a': {-1, 5}, 'b': {-1}}, {'a': {-2, 5}, 'b': {-1}}
+        self.assertEqual(hash(frozenset(first['a'])), hash(frozenset(second['a'])))
+        for first, second in ((first, second), ({'a': {1, 2 ** 61}, 'b': {1}}, {'a': {2, 2 ** 61}, 'b': {1}})):
+            cache = DecodeCache()
+            cache.decode_venn_counts(first)
+            self.assertEqual(cache.decode_venn_counts(second), decode_venn_counts(second))
+            self.assertEqual(cache.decode_venn_counts(second), decode_venn_counts(second))
+            self.assertEqual(cache.decode_venn_counts(first), decode_venn_counts(first))
+        # the fingerprints of -1 and -2 collide, the checksums do not
+        self.assertEqual(fingerprint({'a': {-1, 5}}), fingerprint({'a': {-2, 5}}))
+        self.assertNotEqual(checksum({'a': {-1, 5}}), checksum({'a': {-2, 5}}))
+
+    def test_shared_cache_budget(self):
+        self.assertIsNotNone(decode_cache.max_bytes)
+
+    def test_hit_miss(self):
+        cache = DecodeCache()
+        data = {'a': {1, 2, 3}, 'b': {2, 3, 4}}
+        self.assertEqual(cache.decode_venn_data(data), decode_venn_data(data))
+        self.assertEqual(cache.decode_venn_data({'a': {3, 2, 1}, 'b': {2, 3, 4}}), decode_venn_data(data))
+        self.assertEqual(cache.decode_venn_counts(data, sparse=True), decode_venn_counts(data, sparse=True))
+        info = cache.cache_info()
+        self.assertEqual((info.hits, info.misses, info.size), (1, 2, 2))
+
+    def test_lru_eviction(self):
+        cache = DecodeCache(max_size=2)
+        for i in range(3):
+            cache.decode_venn_counts({'a': {i}})
+        cache.decode_venn_counts({'a': {2}})
+        cache.decode_venn_counts({'a': {0}})
+        info = cache.cache_info()
+        self.assertEqual((info.hits, info.misses, info.evictions, info.size), (1, 4, 2, 2))
+
+    def test_byte_budget(self):
+        cache = DecodeCache(max_size=None, max_bytes=2000)
+        for i in range(20):
+            cache.decode_venn_counts({'a': {i}, 'b': {i + 1}})
+        info = cache.cache_info()
+        self.assertLessEqual(info.nbytes, 2000)
+        self.assertGreater(info.evictions, 0)
+
+        cache.clear()
+        self.assertEqual(cache.cache_info(), (0, 0, 0, 0, None, 0, 2000))
+
+    def test_quantize_counts(self):
+        self.assertEqual(quantize_counts({1: 10, 2: 30, 3: 60}), ((1, 100), (2, 300), (3, 600)))
+        self.assertEqual(quantize_counts({1: 1000, 2: 3001, 3: 6000}), quantize_counts({1: 10, 2: 30, 3: 60}))
+        self.assertEqual(quantize_counts({1: 1, 2: 1000}, resolution=0.01), ((2, 100),))
+        self.assertEqual(quantize_counts({}), ())
+
+    def test_layout_cache(self):
+        calls = []
+
+        def compute(counts, n_sets, **options):
+            calls.append(counts)
+            return cal_venn_geometry(counts, n_sets, **options)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = LayoutCache(path=tmp)
+            counts = {1: 100, 2: 50, 3: 30, 4: 40, 5: 10, 6: 20, 7: 5}
+            geometry = cache.get_layout(counts, 3, lambda: compute(counts, 3, up=True), up=True)
+            # near-identical proportions share the geometry
+            near = {**counts, 1: 100.01}
+            self.assertIs(cache.get_layout(near, 3, lambda: compute(near, 3, up=True), up=True), geometry)
+            cache.get_layout(counts, 3, lambda: compute(counts, 3, up=False), up=False)
+            self.assertEqual(len(calls), 2)
+            self.assertEqual(len(os.listdir(tmp)), 2)
+
+            # a new cache in another process reads the stored geometry
+            stored = LayoutCache(path=tmp).get_layout(counts, 3, lambda: compute(counts, 3, up=True), up=True)
+            self.assertEqual(len(calls), 2)
+            self.assertEqual(stored["region_anchors"].keys(), geometry["region_anchors"].keys())
+            for key in ("circles", "set_anchors", "limits"):
+                self.assertEqual([tuple(v) for v in stored[key]], [tuple(v) for v in geometry[key]])
+            self.assertAlmostEqual(stored["stress"], geometry["stress"])
+
+    def test_layout_cache_empty_region(self):
+        # a one element overlap rounds to a zero proportion, but it is not the disjoint layout
+        cache = LayoutCache()
+        disjoint, overlap = {1: 5000, 2: 5000, 3: 0}, {1: 4999, 2: 5000, 3: 1}
+        self.assertEqual(quantize_counts(disjoint), quantize_counts(overlap))
+        first = cache.get_layout(disjoint, 2, lambda: cal_venn_geometry(disjoint, 2))
+        second = cache.get_layout(overlap, 2, lambda: cal_venn_geometry(overlap, 2))
+        self.assertIsNot(first, second)
+        self.assertEqual(cache.cache_info().misses, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Author   : zhyemqww
+# @Time     : 2026/10/19 05:50
+# @File     : test_venn_geometry
+# @Project  : Toolbox
+# @Desc     :
+
+import subprocess
+import sys
+import unittest
+
+import numpy as np
+
+from src.venn.venn_geometry import cal_region_geometry, cal_venn_geometry, fit_geometry
+from src.venn.venn_utils import cal_layout_error, cal_region_moments
+
+
+def cal_polygon_area(ring: np.ndarray) -> float:
+    x, y = ring[:, 0], ring[:, 1]
+    return float(np.dot(x, np.roll(y, -1)) - np.dot(y, np.roll(x, -1))) / 2
+
+
+def cal_mask(circles: list, point: np.ndarray) -> int:
+    return sum(1 << i for i, (x, y, r) in enumerate(circles) if np.hypot(point[0] - x, point[1] - y) < r)
+
+
+class TestVennGeometry(unittest.TestCase):
+
+    def setUp(self):
+        self.circles = [(0.0, 0.0, 1.0), (1.2, 0.0, 0.8), (0.5, 0.9, 0.7)]
+
+    def test_region_geometry(self):
+        regions = cal_region_geometry(self.circles, n_points=720)
+        self.assertEqual(set(regions), set(range(1, 8)))
+        for mask, region in regions.items():
+            area = sum(cal_polygon_area(ring) for ring in region.polygons)
+            self.assertAlmostEqual(area, region.area, delta=1e-3 * region.area)
+            self.assertEqual(region.centroid.shape, (2,))
+            self.assertEqual(cal_mask(self.circles, region.anchor), mask)
+
+    def test_region_geometry_hole(self):
+        # the region of the large circle alone surrounds the small one
+        regions = cal_region_geometry([(0.0, 0.0, 1.0), (0.1, 0.0, 0.3)], n_points=720)
+        self.assertEqual(len(regions[1].polygons), 2)
+        self.assertAlmostEqual(sum(cal_polygon_area(ring) for ring in regions[1].polygons), np.pi * 0.91, places=3)
+        # the centroid of the ring is within the hole, the anchor is not
+        self.assertEqual(cal_mask([(0.0, 0.0, 1.0), (0.1, 0.0, 0.3)], regions[1].anchor), 1)
+
+    def test_venn_geometry(self):
+        counts = {1: 50, 2: 30, 4: 40, 3: 10, 5: 12, 6: 8, 7: 5}
+        geometry = cal_venn_geometry(counts, 3)
+        self.assertEqual(set(geometry["region_anchors"]), set(range(1, 8)))
+        for mask, anchor in geometry["region_anchors"].items():
+            self.assertEqual(cal_mask(geometry["circles"], anchor), mask)
+        self.assertLess(geometry["stress"], 1e-2)
+
+    def test_fit_geometry(self):
+        counts = {1: 50, 2: 30, 4: 40, 8: 20, 3: 10, 5: 12, 6: 8, 9: 6, 7: 5}
+        geometry = cal_venn_geometry(counts, 4, time_budget=0.1)
+        # near-identical counts with one more non-empty region
+        near = {**counts, 1: 51, 12: 1}
+        fitted = fit_geometry(geometry, near)
+        self.assertEqual(fitted["circles"], geometry["circles"])
+        self.assertEqual(set(fitted["region_anchors"]), set(geometry["region_anchors"]) | {12})
+        regions = cal_region_moments([tuple(circle) for circle in geometry["circles"]])
+        stress, errors = cal_layout_error({mask: v[0] for mask, v in regions.items()}, near)
+        self.assertEqual((fitted["stress"], fitted["errors"]), (stress, errors))
+        self.assertNotEqual(fitted["errors"], geometry["errors"])
+
+    def test_no_matplotlib(self):
+        code = "import sys, src.venn.venn_geometry; print('matplotlib' in sys.modules)"
+        output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout
+        self.assertEqual(output.strip(), "False")
+
+
+if __name__ == '__main__':
+    unittest.main()
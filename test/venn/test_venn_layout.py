@@ -0,0 +1,91 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Author   : zhyemqww
+# @Time     : 2026/10/19 04:40
+# @File     : test_venn_layout
+# @Project  : Toolbox
+# @Desc     :
+
+import random
+import time
+import unittest
+
+import numpy as np
+
+from src.venn.decode_venn_data import cal_membership
+from src.venn.venn_layout import layout_venn, cal_pair_loss, cal_stress, cal_stress_gradient
+
+
+def region_counts(data: dict) -> dict:
+    counts = {}
+    for mask in cal_membership(data).values():
+        counts[mask] = counts.get(mask, 0) + 1
+    return counts
+
+
+class TestVennLayout(unittest.TestCase):
+
+    def test_two_sets(self):
+        layout = layout_venn({1: 30, 2: 10, 3: 20}, 2)
+        self.assertLess(layout.stress, 1e-6)
+        # the areas of the circles are the set sizes
+        np.testing.assert_allclose(layout.circles[:, 2] ** 2 / layout.circles[0, 2] ** 2, [1, 30 / 50])
+
+    def test_exact_layouts(self):
+        # disjoint, nested and chained circles can be laid out exactly
+        for counts, n in (({1: 10, 2: 20}, 2), ({1: 10, 3: 5}, 2), ({1: 10, 3: 5, 2: 10, 6: 5, 4: 10}, 3)):
+            self.assertLess(layout_venn(counts, n).stress, 1e-4, counts)
+
+    def test_many_sets(self):
+        rng = random.Random(0)
+        for n in (4, 5, 6):
+            data = {f"s{i}": {rng.randint(0, 1500) for _ in range(rng.randint(200, 600))} for i in range(n)}
+            t = time.perf_counter()
+            layout = layout_venn(region_counts(data), n, time_budget=0.5)
+            self.assertLess(time.perf_counter() - t, 1.0)
+            self.assertEqual(layout.circles.shape, (n, 3))
+            self.assertLess(layout.stress, 0.3)
+
+    def test_pair_loss_gradient(self):
+        rng = np.random.default_rng(0)
+        centers, radii, overlaps = rng.normal(size=(4, 2)), rng.uniform(0.5, 1, 4), rng.uniform(0, 0.3, 6)
+        loss, gradient = cal_pair_loss(centers, radii, overlaps)
+        h = 1e-6
+        for index in np.ndindex(centers.shape):
+            shifted = centers.copy()
+            shifted[index] += h
+            self.assertAlmostEqual((cal_pair_loss(shifted, radii, overlaps)[0] - loss) / h, gradient[index], places=4)
+
+    def test_reproducible(self):
+        # the layout does not depend on the time budget when it is not exhausted
+        rng = random.Random(1)
+        data = {f"s{i}": {rng.randint(0, 800) for _ in range(rng.randint(200, 400))} for i in range(4)}
+        layout = layout_venn(region_counts(data), 4)
+        for time_budget in (0.8, 100):
+            other = layout_venn(region_counts(data), 4, time_budget=time_budget)
+            np.testing.assert_array_equal(other.circles, layout.circles)
+            self.assertEqual(other.restarts, 8)
+
+    def test_stress_gradient(self):
+        rng = np.random.default_rng(1)
+        centers, radii = rng.normal(scale=0.5, size=(4, 2)), rng.uniform(0.5, 1, 4)
+        counts = {mask: float(rng.uniform(1, 10)) for mask in range(1, 16)}
+        stress, gradient = cal_stress_gradient(centers, radii, counts)
+        self.assertEqual(stress, cal_stress(centers, radii, counts))
+        h = 1e-7
+        for index in np.ndindex(centers.shape):
+            shifted = centers.copy()
+            shifted[index] += h
+            self.assertAlmostEqual((cal_stress(shifted, radii, counts) - stress) / h, gradient[index], places=4)
+
+    def test_invalid(self):
+        with self.assertRaises(Exception):
+            layout_venn({1: 1}, 1)
+        with self.assertRaises(Exception):
+            layout_venn({1: 1, 8: 1}, 3)
+        with self.assertRaises(Exception):
+            layout_venn({1: 1, 3: 1}, 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,186 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Author   : zhyemqww
+# @Time     : 2026/10/19 01:50
+# @File     : test_venn_utils
+# @Project  : Toolbox
+# @Desc     :
+
+import math
+import random
+import unittest
+
+import numpy as np
+
+from src.venn.venn_utils import cal_distance, cal_distance_batch, cal_lens_area, cal_lens_area_array, \
+    cal_lens_area_derivative, cal_radian, cal_radian_array, split_arc, split_arc_array, cal_centroid, \
+    cal_centroid_array, cal_region_moments, cal_region_gradients, cal_layout_error, cal_halton, estimate_region_areas, \
+    estimate_layout_error
+
+
+class TestVennUtils(unittest.TestCase):
+
+    def test_lens_area(self):
+        self.assertEqual(cal_lens_area(1, 1, 2), 0)
+        self.assertAlmostEqual(cal_lens_area(1, 0.5, 0.2), math.pi / 4)
+        # two unit circles at distance 1
+        self.assertAlmostEqual(cal_lens_area(1, 1, 1), 2 * math.pi / 3 - math.sqrt(3) / 2)
+        for d in (0.35, 0.9, 1.4):
+            h = 1e-6
+            numeric = (cal_lens_area(1, 0.7, d + h) - cal_lens_area(1, 0.7, d - h)) / (2 * h)
+            self.assertAlmostEqual(cal_lens_area_derivative(1, 0.7, d), numeric, places=6)
+
+    def test_cal_distance(self):
+        rng = random.Random(0)
+        for _ in range(500):
+            s1, s2, a = rng.uniform(0, 1000), rng.uniform(0, 1000), rng.uniform(0, 1000)
+            for normalization in (True, False):
+                r1, r2, d, info = cal_distance(s1, s2, a, normalization=normalization, full_output=True)
+                self.assertTrue(info.converged)
+                self.assertLess(info.iterations, 10)
+                self.assertTrue(abs(r1 - r2) <= d <= r1 + r2)
+                expected = a * math.pi / (max(s1, s2) + a) if normalization else a
+                self.assertAlmostEqual(cal_lens_area(r1, r2, d), expected, delta=1e-9 * max(1.0, expected))
+
+    def test_cal_distance_limits(self):
+        self.assertEqual(cal_distance(3, 4, 0, normalization=False)[2], math.sqrt(3 / math.pi) + math.sqrt(4 / math.pi))
+        r1, r2, d = cal_distance(5, 0, 5)
+        self.assertEqual((r1, d), (1.0, 1 - r2))
+        self.assertEqual(cal_distance(0, 0, 5)[2], 0)
+        self.assertEqual(len(cal_distance(1, 2, 3)), 3)
+        with self.assertRaises(Exception):
+            cal_distance(-1, 2, 0)
+
+    def test_cal_distance_empty(self):
+        # empty circles touch at their centers
+        for normalization in (True, False):
+            self.assertEqual(cal_distance(0, 0, 0, normalization=normalization), (0, 0, 0))
+            r1, r2, d = cal_distance(0, 3, 0, normalization=normalization)
+            self.assertEqual((r1, d), (0, r2))
+            r1, r2, d = cal_distance_batch([0, 0], [0, 3], [0, 0], normalization=normalization)
+            self.assertEqual(d.tolist(), (r1 + r2).tolist())
+
+    def test_cal_distance_near_identical(self):
+        # nearly identical large sets, the circles are almost concentric
+        for s1, s2, a in ((6, 8, 4566230.7), (4, 4, 9416797), (1, 0, 1e9)):
+            r1, r2, d, info = cal_distance(s1, s2, a, normalization=False, full_output=True)
+            self.assertTrue(info.converged)
+            self.assertLess(info.iterations, 10)
+            self.assertAlmostEqual(cal_lens_area(r1, r2, d), a, delta=1e-9 * a)
+            *_, info = cal_distance_batch(s1, s2, a, normalization=False, full_output=True)
+            self.assertTrue(info.converged)
+            self.assertLess(info.iterations, 10)
+
+    def test_cal_distance_batch(self):
+        rng = np.random.default_rng(0)
+        s1, s2, a = rng.uniform(0, 1000, (3, 300))
+        a[:5] = 0
+        s2[5:10] = 0
+        for normalization in (True, False):
+            r1, r2, d, info = cal_distance_batch(s1, s2, a, normalization=normalization, full_output=True)
+            self.assertTrue(info.converged.all())
+            expected = np.array([cal_distance(*args, normalization=normalization) for args in zip(s1, s2, a)])
+            np.testing.assert_allclose(np.stack([r1, r2, d], axis=1), expected, rtol=1e-9, atol=1e-12)
+            np.testing.assert_allclose(cal_lens_area_array(r1, r2, d),
+                                       [cal_lens_area(*args) for args in zip(r1, r2, d)], rtol=1e-12)
+
+        r1, r2, d = cal_distance_batch(1, 2, 3)
+        self.assertAlmostEqual(d, cal_distance(1, 2, 3)[2])
+        self.assertEqual(cal_distance_batch([[1, 2]], [3], [0.5, 0])[2].shape, (1, 2))
+        with self.assertRaises(Exception):
+            cal_distance_batch([1, 2], [1, 2], [1, -1])
+
+    def test_arrays(self):
+        rng = np.random.default_rng(0)
+        points = rng.normal(size=(50, 2))
+        np.testing.assert_allclose(cal_radian_array(0.5, -0.2, points) % (2 * math.pi),
+                                   [cal_radian(0.5, -0.2, x, y) % (2 * math.pi) for x, y in points])
+
+        for start, end in rng.normal(size=(20, 2, 2)):
+            np.testing.assert_allclose(split_arc_array(0.5, -0.2, 2, start, end, n=20),
+                                       split_arc(0.5, -0.2, 2, tuple(start), tuple(end), n=20), atol=1e-12)
+        self.assertAlmostEqual(cal_centroid_array(split_arc_array(0, 0, 1, (1, 0), (1, 0), n=1000))[0], math.pi,
+                               places=4)
+
+        polygon = np.concatenate([split_arc_array(0, 0, 1, (1, 0), (-1, 0)), split_arc_array(0, 0, 1, (-1, 0), (1, 0))])
+        area, centroid = cal_centroid_array(polygon, bias=0.1)
+        expected_area, expected_centroid = cal_centroid([tuple(p) for p in polygon], bias=0.1)
+        self.assertAlmostEqual(area, expected_area)
+        np.testing.assert_allclose(centroid, expected_centroid, atol=1e-12)
+
+    def test_region_gradients(self):
+        circles = [(0.0, 0.0, 1.0), (1.2, 0.1, 0.8), (0.5, 0.9, 0.7), (0.3, -0.6, 0.5)]
+        gradients = cal_region_gradients(circles)
+        regions = cal_region_moments(circles)
+        h = 1e-7
+        for k in range(len(circles)):
+            for axis in range(2):
+                shifted = [list(circle) for circle in circles]
+                shifted[k][axis] += h
+                moved = cal_region_moments([tuple(circle) for circle in shifted])
+                for mask, (area, _) in regions.items():
+                    self.assertAlmostEqual((moved[mask][0] - area) / h, gradients[mask][k, axis], places=5)
+        # a moved disjoint circle does not change the areas
+        np.testing.assert_allclose(cal_region_gradients([(0, 0, 1), (5, 0, 1)])[1], 0, atol=1e-12)
+
+    def test_region_moments(self):
+        # two unit circles at distance 1, the lens is symmetric about x = 1/2
+        lens = 2 * math.pi / 3 - math.sqrt(3) / 2
+        regions = cal_region_moments([(0, 0, 1), (1, 0, 1)])
+        self.assertEqual(sorted(regions), [1, 2, 3])
+        self.assertAlmostEqual(regions[3][0], lens)
+        np.testing.assert_allclose(regions[3][1], (0.5, 0), atol=1e-12)
+        self.assertAlmostEqual(regions[1][0], math.pi - lens)
+        # the centroids of the crescents balance the lens within the circle
+        self.assertAlmostEqual(regions[1][0] * regions[1][1][0] + lens * 0.5, 0)
+
+        # a circle within another, and a disjoint one
+        regions = cal_region_moments([(0, 0, 2), (0.5, 0, 1), (5, 5, 1)])
+        self.assertEqual(sorted(regions), [1, 3, 4])
+        self.assertAlmostEqual(regions[1][0], 3 * math.pi)
+        np.testing.assert_allclose(regions[1][1], (-0.5 / 3, 0), atol=1e-12)
+        np.testing.assert_allclose(regions[4][1], (5, 5), atol=1e-12)
+
+        # the regions of three circles against a fine sampling
+        circles = [(0, 0, 1), (1.2, 0, 0.8), (0.5, 1, 0.9)]
+        regions = cal_region_moments(circles)
+        grid = np.stack(np.meshgrid(np.linspace(-1.5, 2.5, 1001), np.linspace(-1.5, 2.5, 1001)), axis=-1).reshape(-1, 2)
+        inside = np.stack([np.hypot(*(grid - (x, y)).T) < r for x, y, r in circles], axis=1)
+        masks = inside @ (1 << np.arange(3))
+        cell = (4 / 1000) ** 2
+        for mask in range(1, 8):
+            self.assertAlmostEqual(regions[mask][0], (masks == mask).sum() * cell, places=2)
+            np.testing.assert_allclose(regions[mask][1], grid[masks == mask].mean(axis=0), atol=5e-3)
+
+    def test_layout_error(self):
+        stress, errors = cal_layout_error({1: 2.0, 2: 4.0, 3: 6.0}, {1: 1, 2: 2, 3: 3})
+        self.assertAlmostEqual(stress, 0)
+        self.assertEqual(sorted(errors), [1, 2, 3])
+        self.assertTrue(all(abs(e) < 1e-12 for e in errors.values()))
+        stress, errors = cal_layout_error({1: 1.0, 3: 1.0}, {1: 1, 2: 1, 3: 2})
+        self.assertGreater(stress, 0)
+        self.assertAlmostEqual(errors[2], -0.25)
+        self.assertAlmostEqual(sum(errors.values()), 0)
+
+    def test_estimate_region_areas(self):
+        np.testing.assert_allclose(cal_halton(7, 2), [1 / 2, 1 / 4, 3 / 4, 1 / 8, 5 / 8, 3 / 8, 7 / 8])
+
+        rng = np.random.default_rng(0)
+        circles = np.column_stack((rng.normal(size=(5, 2)), rng.uniform(0.6, 1.2, 5)))
+        exact = cal_region_moments([tuple(c) for c in circles])
+        for method in ("halton", "grid"):
+            areas = estimate_region_areas(circles, method=method)
+            self.assertEqual(areas.shape, (32,))
+            for mask in range(1, 32):
+                self.assertAlmostEqual(areas[mask], exact[mask][0] if mask in exact else 0, delta=5e-3)
+
+        counts = {mask: area for mask, (area, _) in exact.items()}
+        stress, errors = estimate_layout_error(circles, counts)
+        self.assertLess(stress, 1e-4)
+        self.assertTrue(all(abs(e) < 1e-3 for e in errors.values()))
+        with self.assertRaises(Exception):
+            estimate_region_areas(circles, method="random")
+
+
+if __name__ == '__main__':
+    unittest.main()